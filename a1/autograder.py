@@ -79,6 +79,10 @@ def readCommand(argv):
                     dest = 'noGraphics',
                     action = 'store_true',
                     help = 'No graphics display for pacman games.')
+    parser.add_option('--search-statistics',
+                    dest = 'statisticsFile',
+                    default = None,
+                    help = 'Write the statistics of every search run by the tests to this file, as JSON.')
     (options, args) = parser.parse_args(argv)
     return options
 
@@ -195,6 +199,18 @@ def printTest(testDict, solutionDict):
         print "   |", line
 
 
+def recordStatistics(testCase, fun, statisticsLog):
+    "Wraps a test function so the search statistics it logs name the test."
+    def run(grades):
+        first = len(statisticsLog)
+        try:
+            return fun(grades)
+        finally:
+            for entry in statisticsLog[first:]:
+                entry['test'] = testCase.path
+    return run
+
+
 def runTest(testName, moduleDict, printTestCase=False, display=None):
     import testParser
     import testClasses
@@ -246,7 +262,7 @@ def getTestSubdirs(testParser, testRoot, questionToGrade):
 # evaluate student code
 def evaluate(generateSolutions, testRoot, moduleDict, exceptionMap=ERROR_HINT_MAP,
              edxOutput=False, muteOutput=False, gsOutput=False,
-            printTestCase=False, questionToGrade=None, display=None):
+            printTestCase=False, questionToGrade=None, display=None, statisticsFile=None):
     # imports of testbench code.  note that the testClasses import must follow
     # the import of student code due to dependencies
     import testParser
@@ -254,6 +270,10 @@ def evaluate(generateSolutions, testRoot, moduleDict, exceptionMap=ERROR_HINT_MA
     for module in moduleDict:
         setattr(sys.modules[__name__], module, moduleDict[module])
 
+    statisticsLog = None
+    if statisticsFile != None and 'search' in moduleDict:
+        statisticsLog = moduleDict['search'].STATISTICS_LOG = []
+
     questions = []
     questionDicts = {}
     test_subdirs = getTestSubdirs(testParser, testRoot, questionToGrade)
@@ -293,7 +313,10 @@ def evaluate(generateSolutions, testRoot, moduleDict, exceptionMap=ERROR_HINT_MA
                         return lambda grades: printTest(testDict, solutionDict) or testCase.execute(grades, moduleDict, solutionDict)
                     else:
                         return lambda grades: testCase.execute(grades, moduleDict, solutionDict)
-            question.addTestCase(testCase, makefun(testCase, solution_file))
+            fun = makefun(testCase, solution_file)
+            if statisticsLog != None:
+                fun = recordStatistics(testCase, fun, statisticsLog)
+            question.addTestCase(testCase, fun)
 
         # Note extra function is necessary for scoping reasons
         def makefun(question):
@@ -309,6 +332,10 @@ def evaluate(generateSolutions, testRoot, moduleDict, exceptionMap=ERROR_HINT_MA
                 grades.addPrereq(q, prereq)
 
     grades.grade(sys.modules[__name__], bonusPic = projectParams.BONUS_PIC)
+    if statisticsLog != None:
+        import json
+        with open(statisticsFile, 'w') as handle:
+            json.dump(statisticsLog, handle, indent=2, sort_keys=True)
     return grades.points
 
 
@@ -355,4 +382,5 @@ if __name__ == '__main__':
         evaluate(options.generateSolutions, options.testRoot, moduleDict,
             gsOutput=options.gsOutput,
             edxOutput=options.edxOutput, muteOutput=options.muteOutput, printTestCase=options.printTestCase,
-            questionToGrade=options.gradeQuestion, display=getDisplay(options.gradeQuestion!=None, options))
+            questionToGrade=options.gradeQuestion, display=getDisplay(options.gradeQuestion!=None, options),
+            statisticsFile=options.statisticsFile)
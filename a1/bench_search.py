@@ -0,0 +1,280 @@
+# bench_search.py
+# ---------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+# 
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Benchmarks the search functions of search.py on the search problems of
+searchAgents.py over the layouts in layouts/.
+
+Every (layout, problem, algorithm, heuristic) combination runs in a process
+of its own, so a run that goes over the time limit can be killed and peak
+memory is that of the one run.  Each run records its status, nodes expanded
+and generated, the cost of the path found, seconds and peak memory, and the
+results can be written as CSV or JSON.
+
+A JSON file from an earlier run can be given as the baseline; any run that
+now expands more nodes, finds a costlier path, or (with --time-threshold)
+takes longer than the baseline by more than the threshold is reported as a
+regression, and the exit status is 1.
+
+> python bench_search.py -l mediumMaze,bigMaze -a bfs,astar --json base.json
+> python bench_search.py -l mediumMaze,bigMaze -a bfs,astar --baseline base.json
+
+A reference baseline is kept in bench_baseline.json: dfs, bfs, ucs and
+astar with every heuristic, on PositionSearchProblem over tinyMaze,
+smallMaze, mediumMaze, bigMaze and openMaze, CornersProblem over
+tinyCorners and mediumCorners, and FoodSearchProblem over tinySearch,
+testSearch and trickySearch.  --check reruns exactly the runs in it and
+compares against it:
+
+> python bench_search.py --check
+
+After a change that is meant to alter the results, --check with --json
+bench_baseline.json rewrites the reference from the new runs.  Its seconds
+and memory come from whatever machine last wrote it, so only expansions,
+path costs and status are compared unless --time-threshold is given.
+"""
+
+import os
+import sys
+import time
+
+LAYOUT_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'layouts')
+REFERENCE_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_baseline.json')
+
+# The heuristics tried with each problem type, by algorithms that take one
+PROBLEM_HEURISTICS = {
+    'PositionSearchProblem': ['nullHeuristic', 'manhattanHeuristic', 'euclideanHeuristic'],
+    'CornersProblem': ['nullHeuristic', 'cornersHeuristic'],
+    'FoodSearchProblem': ['nullHeuristic', 'foodHeuristic'],
+}
+
+FIELDS = ['layout', 'problem', 'algorithm', 'heuristic', 'status', 'expanded', 'generated',
+          'maxFrontier', 'pathCost', 'seconds', 'peakMemory']
+
+def getLayoutNames():
+    return sorted([name[:-len('.lay')] for name in os.listdir(LAYOUT_DIRECTORY) if name.endswith('.lay')])
+
+def takesHeuristic(algorithm):
+    import search
+    return 'heuristic' in getattr(search, algorithm).func_code.co_varnames
+
+def getRuns(layouts, problems, algorithms, heuristics=None):
+    """
+    Returns the (layout, problem, algorithm, heuristic) combinations to run;
+    heuristic is None for algorithms without one.  heuristics, if given,
+    limits the heuristics tried.
+    """
+    runs = []
+    for layoutName in layouts:
+        for problem in problems:
+            for algorithm in algorithms:
+                if not takesHeuristic(algorithm):
+                    runs.append((layoutName, problem, algorithm, None))
+                    continue
+                for heuristic in PROBLEM_HEURISTICS[problem]:
+                    if heuristics is None or heuristic in heuristics:
+                        runs.append((layoutName, problem, algorithm, heuristic))
+    return runs
+
+def makeProblem(problemName, gameState):
+    import searchAgents
+    if problemName == 'PositionSearchProblem':
+        return searchAgents.PositionSearchProblem(gameState, warn=False, visualize=False)
+    return getattr(searchAgents, problemName)(gameState)
+
+def runSearch(run):
+    """
+    Runs one combination in this process and returns its result as a dict
+    with the keys in FIELDS.
+    """
+    import layout, pacman, search, searchAgents
+    layoutName, problemName, algorithm, heuristic = run
+    result = dict([(field, None) for field in FIELDS])
+    result.update(layout=layoutName, problem=problemName, algorithm=algorithm, heuristic=heuristic)
+    lay = layout.tryToLoad(os.path.join(LAYOUT_DIRECTORY, layoutName + '.lay'))
+    gameState = pacman.GameState()
+    gameState.initialize(lay, 0)
+    problem = makeProblem(problemName, gameState)
+    func = getattr(search, algorithm)
+    start = time.time()
+    if heuristic is None:
+        path = func(problem)
+    else:
+        heur = getattr(searchAgents, heuristic, None) or getattr(search, heuristic)
+        path = func(problem, heuristic=heur)
+    result['seconds'] = time.time() - start
+    stats = getattr(problem, 'searchStatistics', None)
+    if stats is not None:
+        result.update(expanded=stats.expanded, generated=stats.generated,
+                      maxFrontier=stats.maxFrontier, peakMemory=stats.peakMemory)
+    if path is None:
+        result['status'] = 'no path'
+    else:
+        result['status'] = 'ok'
+        result['pathCost'] = problem.getCostOfActions(path)
+    return result
+
+def _runInChild(run, results):
+    import traceback
+    sys.stdout = open(os.devnull, 'w') # the problems print warnings and progress
+    try:
+        results.put(runSearch(run))
+    except Exception:
+        results.put({'status': 'error', 'error': traceback.format_exc().strip().split('\n')[-1]})
+
+def runIsolated(run, timeout):
+    """
+    Runs one combination in a child process, killing it after timeout
+    seconds.  The status of the result is 'ok', 'no path', 'timeout' or
+    'error'.
+    """
+    import multiprocessing
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_runInChild, args=(run, results))
+    start = time.time()
+    process.start()
+    result = None
+    try:
+        result = results.get(timeout=timeout)
+    except Exception: # Queue.Empty: out of time
+        pass
+    if process.is_alive():
+        process.terminate()
+    process.join()
+    layoutName, problemName, algorithm, heuristic = run
+    base = dict([(field, None) for field in FIELDS])
+    base.update(layout=layoutName, problem=problemName, algorithm=algorithm, heuristic=heuristic)
+    if result is None:
+        base.update(status='timeout', seconds=time.time() - start)
+        return base
+    base.update(result)
+    return base
+
+def runKey(result):
+    return (result['layout'], result['problem'], result['algorithm'], result['heuristic'])
+
+def compareToBaseline(results, baseline, threshold=0.1, timeThreshold=None):
+    """
+    Returns a list of (result, message) pairs, one for each regression of
+    results against baseline, both lists of result dicts.  Runs that
+    expanded more nodes than the baseline by more than threshold (a
+    fraction), found a costlier path, or stopped succeeding are
+    regressions, as are, when timeThreshold is given, runs slower by more
+    than that fraction.
+    """
+    before = dict([(runKey(result), result) for result in baseline])
+    regressions = []
+    for result in results:
+        old = before.get(runKey(result))
+        if old is None:
+            continue
+        if old['status'] == 'ok' and result['status'] != 'ok':
+            regressions.append((result, 'status %s, was ok' % result['status']))
+            continue
+        if result['status'] != 'ok' or old['status'] != 'ok':
+            continue
+        if result['pathCost'] > old['pathCost']:
+            regressions.append((result, 'path cost %s, was %s' % (result['pathCost'], old['pathCost'])))
+        if result['expanded'] > old['expanded'] * (1 + threshold):
+            regressions.append((result, 'expanded %d, was %d' % (result['expanded'], old['expanded'])))
+        if timeThreshold is not None and result['seconds'] > old['seconds'] * (1 + timeThreshold):
+            regressions.append((result, '%.3f seconds, was %.3f' % (result['seconds'], old['seconds'])))
+    return regressions
+
+def writeCSV(results, path):
+    import csv
+    handle = open(path, 'wb')
+    writer = csv.DictWriter(handle, FIELDS, extrasaction='ignore')
+    writer.writerow(dict(zip(FIELDS, FIELDS)))
+    for result in results:
+        writer.writerow(result)
+    handle.close()
+
+def writeJSON(results, path):
+    import json
+    handle = open(path, 'w')
+    json.dump(results, handle, indent=2, sort_keys=True)
+    handle.close()
+
+def formatResult(result):
+    def show(value, format):
+        if value is None: return '-'
+        return format % value
+    return '%-18s %-22s %-12s %-19s %-8s %9s %9s %9s %9s' % (
+        result['layout'], result['problem'], result['algorithm'], result['heuristic'] or '-',
+        result['status'], show(result['expanded'], '%d'), show(result['pathCost'], '%d'),
+        show(result['seconds'], '%.3f'), show(result['peakMemory'] and result['peakMemory'] / 1024 ** 2, '%dM'))
+
+def readCommand(argv):
+    from optparse import OptionParser
+    parser = OptionParser(__doc__)
+    parser.add_option('-l', '--layouts', dest='layouts', default=None,
+                      help='Comma separated layouts [Default: all of layouts/]')
+    parser.add_option('-p', '--problems', dest='problems', default=','.join(sorted(PROBLEM_HEURISTICS)),
+                      help='Comma separated problem types [Default: %default]')
+    parser.add_option('-a', '--algorithms', dest='algorithms', default='dfs,bfs,ucs,astar',
+                      help='Comma separated search.py functions [Default: %default]')
+    parser.add_option('-e', '--heuristics', dest='heuristics', default=None,
+                      help='Comma separated heuristics to limit the sweep to [Default: all that fit]')
+    parser.add_option('-t', '--timeout', dest='timeout', type='float', default=30.0,
+                      help='Seconds before a run is killed [Default: %default]')
+    parser.add_option('--csv', dest='csv', default=None, help='Write the results to this CSV file')
+    parser.add_option('--json', dest='json', default=None, help='Write the results to this JSON file')
+    parser.add_option('--baseline', dest='baseline', default=None,
+                      help='Compare against the results in this JSON file')
+    parser.add_option('--check', action='store_true', dest='check', default=False,
+                      help='Rerun the runs of bench_baseline.json and compare against it')
+    parser.add_option('--threshold', dest='threshold', type='float', default=0.1,
+                      help='Fraction by which nodes expanded may grow [Default: %default]')
+    parser.add_option('--time-threshold', dest='timeThreshold', type='float', default=None,
+                      help='Fraction by which time may grow [Default: time is not compared]')
+    options, otherjunk = parser.parse_args(argv)
+    if len(otherjunk) != 0:
+        raise Exception('Command line input not understood: ' + str(otherjunk))
+    return options
+
+def main(argv):
+    options = readCommand(argv)
+    layouts = getLayoutNames()
+    if options.layouts is not None: layouts = options.layouts.split(',')
+    heuristics = None
+    if options.heuristics is not None: heuristics = options.heuristics.split(',')
+    runs = getRuns(layouts, options.problems.split(','), options.algorithms.split(','), heuristics)
+    if options.check: options.baseline = REFERENCE_BASELINE
+    baseline = None
+    if options.baseline is not None:
+        import json
+        baseline = json.load(open(options.baseline)) # before --json can overwrite it
+    if options.check: runs = [runKey(result) for result in baseline]
+
+    print('%-18s %-22s %-12s %-19s %-8s %9s %9s %9s %9s' % tuple(FIELDS[:6] + ['cost', 'seconds', 'memory']))
+    results = []
+    for run in runs:
+        results.append(runIsolated(run, options.timeout))
+        print(formatResult(results[-1]))
+        if 'error' in results[-1]: print('    ' + results[-1]['error'])
+        sys.stdout.flush()
+
+    if options.csv is not None: writeCSV(results, options.csv)
+    if options.json is not None: writeJSON(results, options.json)
+    if baseline is not None:
+        regressions = compareToBaseline(results, baseline, options.threshold, options.timeThreshold)
+        print('%d regressions against %s' % (len(regressions), options.baseline))
+        for result, message in regressions:
+            print('  %s %s %s %s: %s' % (runKey(result) + (message,)))
+        if regressions: return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
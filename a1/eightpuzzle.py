@@ -183,20 +183,213 @@ class EightPuzzleState:
     def __str__(self):
         return self.__getAsciiString()
 
+def _moveTable(width):
+    """
+      For each cell of a width x width board, the (move, cell) pairs
+    reachable by moving the blank from it, in the order of legalMoves.
+    """
+    table = []
+    for cell in range(width * width):
+        row, col = divmod(cell, width)
+        moves = []
+        if row != 0: moves.append(('up', cell - width))
+        if row != width - 1: moves.append(('down', cell + width))
+        if col != 0: moves.append(('left', cell - 1))
+        if col != width - 1: moves.append(('right', cell + 1))
+        table.append(tuple(moves))
+    return tuple(table)
+
+SLIDING_PUZZLE_MOVES = {} # width -> (move table, list of move -> cell dicts)
+
+def getMoveTables(width):
+    if width not in SLIDING_PUZZLE_MOVES:
+        moves = _moveTable(width)
+        SLIDING_PUZZLE_MOVES[width] = (moves, tuple([dict(m) for m in moves]))
+    return SLIDING_PUZZLE_MOVES[width]
+
+class SlidingPuzzleState(object):
+    """
+      A width x width sliding puzzle packed into a single int: the tile in
+    cell i (counting row by row from the top left) is kept in bits bi to
+    bi+b-1, where b = tileBits(width) is 4 up to 4 x 4 and grows with the
+    board beyond that.  Moves are looked up in a table built once per
+    width, a move is two shifts, and hashing or comparing states is
+    hashing or comparing the int.
+
+    It offers the same methods as EightPuzzleState, so either works with
+    EightPuzzleSearchProblem.
+
+    >>> SlidingPuzzleState([1, 0, 2, 3, 4, 5, 6, 7, 8]).result('left').isGoal()
+    True
+    """
+    __slots__ = ('code', 'blank', 'width')
+
+    def __init__( self, numbers ):
+        """
+        numbers: a list of the integers from 0 to width * width - 1, row by
+          row, as for EightPuzzleState
+        """
+        self.width = int(round(len(numbers) ** 0.5))
+        if self.width * self.width != len(numbers):
+            raise ValueError('A sliding puzzle needs a square number of numbers, not %d' % len(numbers))
+        if self.width not in GOAL_CODES:
+            GOAL_CODES[self.width] = goalCode(self.width)
+        bits = tileBits(self.width)
+        self.code = 0
+        for cell, tile in enumerate(numbers):
+            self.code |= tile << (bits * cell)
+            if tile == 0:
+                self.blank = cell
+
+    def _make(self, code, blank):
+        state = object.__new__(self.__class__)
+        state.code, state.blank, state.width = code, blank, self.width
+        return state
+
+    def isGoal( self ):
+        return self.code == GOAL_CODES[self.width]
+
+    def legalMoves( self ):
+        """
+        >>> SlidingPuzzleState([0, 1, 2, 3, 4, 5, 6, 7, 8]).legalMoves()
+        ['down', 'right']
+        """
+        return [move for move, cell in getMoveTables(self.width)[0][self.blank]]
+
+    def result(self, move):
+        "Returns the state after moving the blank; see EightPuzzleState.result"
+        cell = getMoveTables(self.width)[1][self.blank][move]
+        bits = tileBits(self.width)
+        mask = (1 << bits) - 1
+        tile = (self.code >> (bits * cell)) & mask
+        return self._make(self.code & ~(mask << (bits * cell)) | (tile << (bits * self.blank)), cell)
+
+    def successors(self):
+        "Returns a list of (state, move) pairs, one for each legal move"
+        code, blank = self.code, self.blank
+        bits = tileBits(self.width)
+        mask = (1 << bits) - 1
+        result = []
+        for move, cell in getMoveTables(self.width)[0][blank]:
+            tile = (code >> (bits * cell)) & mask
+            result.append((self._make(code & ~(mask << (bits * cell)) | (tile << (bits * blank)), cell), move))
+        return result
+
+    def numbers(self):
+        "Returns the list of tiles, as passed to the constructor"
+        bits = tileBits(self.width)
+        mask = (1 << bits) - 1
+        return [int((self.code >> (bits * cell)) & mask) for cell in range(self.width * self.width)]
+
+    def tilePositions(self):
+        "Returns a list giving the cell of each tile, the blank first"
+        size = self.width * self.width
+        positions = [0] * size
+        bits = tileBits(self.width)
+        mask = (1 << bits) - 1
+        code = self.code
+        for cell in range(size):
+            positions[code & mask] = cell
+            code >>= bits
+        return positions
+
+    def _getCells(self):
+        numbers, width = self.numbers(), self.width
+        return [numbers[row * width:row * width + width] for row in range(width)]
+    cells = property(_getCells)
+
+    def _getBlankLocation(self):
+        return divmod(self.blank, self.width)
+    blankLocation = property(_getBlankLocation)
+
+    def __eq__(self, other):
+        return isinstance(other, SlidingPuzzleState) and self.code == other.code
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.code)
+
+    def __str__(self):
+        cellWidth = len(str(self.width * self.width - 1))
+        horizontalLine = '-' * ((cellWidth + 3) * self.width + 1)
+        lines = [horizontalLine]
+        for row in self.cells:
+            cells = [(str(tile), ' ')[tile == 0].rjust(cellWidth) for tile in row]
+            lines.append('| ' + ' | '.join(cells) + ' |')
+            lines.append(horizontalLine)
+        return '\n'.join(lines)
+
+class CompactEightPuzzleState(SlidingPuzzleState):
+    """
+      A SlidingPuzzleState that is always 3 x 3, kept for code that builds
+    eight puzzles by name.
+
+    >>> CompactEightPuzzleState([1, 0, 2, 3, 4, 5, 6, 7, 8]).result('left').isGoal()
+    True
+    """
+    __slots__ = ()
+
+    def __init__( self, numbers ):
+        "numbers: as for EightPuzzleState"
+        if len(numbers) != 9:
+            raise ValueError('An eight puzzle needs 9 numbers, not %d' % len(numbers))
+        SlidingPuzzleState.__init__(self, numbers)
+
+def tileBits(width):
+    "The bits a tile takes in a packed width x width board: 4, or enough for the largest tile"
+    return max(4, (width * width - 1).bit_length())
+
+def goalCode(width):
+    "The packed goal board: the blank in the top left, then 1, 2, ... in order"
+    bits = tileBits(width)
+    code = 0
+    for cell in range(width * width):
+        code |= cell << (bits * cell)
+    return code
+
+GOAL_CODES = dict([(width, goalCode(width)) for width in (2, 3, 4)]) # filled in for other widths as used
+
+def isSolvable(numbers):
+    """
+      Whether the goal can be reached from the board given by numbers (as
+    for SlidingPuzzleState).  A move keeps the parity of the number of
+    inversions among the tiles plus, on even widths, the row of the blank;
+    the board is solvable exactly when that parity matches the goal's.
+
+    >>> isSolvable([1, 0, 2, 3, 4, 5, 6, 7, 8])
+    True
+    >>> isSolvable([0, 2, 1, 3, 4, 5, 6, 7, 8])
+    False
+    """
+    width = int(round(len(numbers) ** 0.5))
+    tiles = [tile for tile in numbers if tile != 0]
+    inversions = 0
+    for i in range(len(tiles)):
+        for j in range(i + 1, len(tiles)):
+            if tiles[i] > tiles[j]:
+                inversions += 1
+    if width % 2 == 0:
+        inversions += list(numbers).index(0) // width
+    return inversions % 2 == 0
+
 # TODO: Implement The methods in this class
 
 class EightPuzzleSearchProblem(search.SearchProblem):
     """
       Implementation of a SearchProblem for the  Eight Puzzle domain
 
-      Each state is represented by an instance of an eightPuzzle.
+      Each state is represented by an instance of an eightPuzzle, or of a
+      SlidingPuzzleState of any width.
     """
     def __init__(self,puzzle):
         "Creates a new EightPuzzleSearchProblem which stores search information."
         self.puzzle = puzzle
+        self._expanded = 0 # DO NOT CHANGE
 
     def getStartState(self):
-        return puzzle
+        return self.puzzle
 
     def isGoalState(self,state):
         return state.isGoal()
@@ -207,11 +400,30 @@ class EightPuzzleSearchProblem(search.SearchProblem):
           each succesor is either left, right, up, or down
           from the original state and the cost is 1.0 for each
         """
+        self._expanded += 1 # DO NOT CHANGE
+        if isinstance(state, SlidingPuzzleState):
+            return [(next, a, 1) for next, a in state.successors()]
         succ = []
         for a in state.legalMoves():
             succ.append((state.result(a), a, 1))
         return succ
 
+    def iterSuccessors(self, state):
+        """
+          Returns an iterator over the triples of getSuccessors, built one
+          at a time.  The expansion is counted here, when it is asked for.
+        """
+        self._expanded += 1 # DO NOT CHANGE
+        return self._generateSuccessors(state)
+
+    def _generateSuccessors(self, state):
+        if isinstance(state, SlidingPuzzleState):
+            for next, a in state.successors():
+                yield (next, a, 1)
+            return
+        for a in state.legalMoves():
+            yield (state.result(a), a, 1)
+
     def getCostOfActions(self, actions):
         """
          actions: A list of actions to take
@@ -228,6 +440,138 @@ EIGHT_PUZZLE_DATA = [[1, 0, 2, 3, 4, 5, 6, 7, 8],
                      [1, 2, 5, 7, 6, 8, 0, 4, 3],
                      [0, 3, 1, 6, 8, 2, 7, 5, 4]]
 
+# 15-puzzle instances for benchmarking, each with its optimal solution
+# length: createRandomSlidingPuzzle(4, 80, seed) for the seeds 0, 2, 4, 5,
+# 7, 9, 10, 11 and 14, the ones A* with patternDatabaseHeuristic solves
+# within seconds.  They are biased towards easy boards: random walks stay
+# close to the goal, and the seeds were kept only if A* was fast, so the
+# optimal lengths (30 to 44) sit well below the 52 or so of a typical
+# board.  For a stress test, benchmark --random boards from
+# createSolvableSlidingPuzzle, which are drawn uniformly; A* with this
+# heuristic needs minutes and gigabytes of memory for each of those
+FIFTEEN_PUZZLE_DATA = [([4, 1, 6, 3, 13, 2, 5, 10, 8, 9, 0, 11, 15, 14, 7, 12], 32),
+                       ([6, 4, 3, 7, 2, 10, 15, 13, 14, 12, 0, 5, 1, 11, 8, 9], 40),
+                       ([12, 4, 2, 11, 8, 1, 7, 10, 3, 6, 0, 15, 13, 5, 9, 14], 38),
+                       ([8, 4, 3, 7, 10, 0, 6, 11, 5, 2, 1, 15, 13, 9, 12, 14], 30),
+                       ([1, 8, 3, 7, 5, 0, 4, 2, 13, 10, 12, 6, 14, 9, 15, 11], 36),
+                       ([5, 8, 4, 2, 10, 7, 6, 3, 0, 9, 13, 11, 12, 14, 1, 15], 30),
+                       ([8, 1, 3, 5, 9, 7, 2, 6, 0, 4, 13, 12, 14, 15, 11, 10], 40),
+                       ([5, 10, 4, 3, 13, 6, 15, 1, 0, 9, 14, 2, 12, 8, 11, 7], 40),
+                       ([9, 15, 1, 3, 10, 7, 2, 6, 5, 13, 0, 14, 12, 11, 4, 8], 44)]
+
+# Pattern databases
+
+PATTERN_DATABASE_CACHE = {}
+
+class PatternDatabase:
+    """
+      The number of moves of the tiles in pattern needed to bring them home
+    on a width x width board, whatever the other tiles do.  Moves of other
+    tiles are free, so the values of databases over disjoint patterns can
+    be added up and still never overestimate (Korf and Felner, 2002).
+
+    The table is filled by a breadth-first search back from the goal in
+    which moving a tile outside the pattern costs nothing, and is stored
+    in an array('B') indexed by the cells of the pattern tiles.
+    """
+    def __init__(self, pattern, width=3):
+        from array import array
+        self.pattern = tuple(pattern)
+        self.width = width
+        size = width * width
+        self.table = array('B', [255]) * (size ** len(self.pattern))
+        self._search(getMoveTables(width)[0], size)
+
+    def index(self, positions):
+        "positions: the cell of each tile, as from tilePositions"
+        index = 0
+        size = self.width * self.width
+        for tile in self.pattern:
+            index = index * size + positions[tile]
+        return index
+
+    def _search(self, moves, size):
+        from collections import deque
+        table = self.table
+        seen = set()
+        # A node is (moves, cells of the pattern tiles, cell of the blank);
+        # free moves go on the left of the deque, so it stays ordered by cost
+        start = (0, self.pattern, 0)
+        frontier = deque([start])
+        while frontier:
+            cost, cells, blank = frontier.popleft()
+            if (cells, blank) in seen:
+                continue
+            seen.add((cells, blank))
+            index = 0
+            for cell in cells:
+                index = index * size + cell
+            if table[index] == 255:
+                table[index] = cost
+            for move, cell in moves[blank]:
+                if cell in cells:
+                    moved = list(cells)
+                    moved[cells.index(cell)] = blank
+                    frontier.append((cost + 1, tuple(moved), cell))
+                else:
+                    frontier.appendleft((cost, cells, cell))
+
+    def getDistance(self, positions):
+        return self.table[self.index(positions)]
+
+def getPatternDatabases(patterns, width=3):
+    "Returns the PatternDatabase for each pattern, building each only once"
+    databases = []
+    for pattern in patterns:
+        key = (tuple(pattern), width)
+        if key not in PATTERN_DATABASE_CACHE:
+            PATTERN_DATABASE_CACHE[key] = PatternDatabase(pattern, width)
+        databases.append(PATTERN_DATABASE_CACHE[key])
+    return databases
+
+EIGHT_PUZZLE_PATTERNS = ((1, 2, 3, 4), (5, 6, 7, 8))
+
+# The partition of the tiles used by patternDatabaseHeuristic for each width
+SLIDING_PUZZLE_PATTERNS = {2: ((1, 2, 3),),
+                           3: EIGHT_PUZZLE_PATTERNS,
+                           4: ((1, 2, 3, 4), (5, 6, 7, 8), (9, 10, 11, 12), (13, 14, 15))}
+
+def patternDatabaseHeuristic(state, problem=None):
+    """
+      The sum of the additive pattern databases over the partition in
+    SLIDING_PUZZLE_PATTERNS for the width of the board.  Admissible and
+    consistent, and never lower than the Manhattan distance.  Boards with
+    no partition there, whose databases would take too long to build,
+    fall back to the Manhattan distance.
+
+    >>> patternDatabaseHeuristic(CompactEightPuzzleState([1, 2, 0, 3, 4, 5, 6, 7, 8]))
+    2
+    """
+    if not isinstance(state, SlidingPuzzleState):
+        state = SlidingPuzzleState(sum(state.cells, []))
+    if state.width not in SLIDING_PUZZLE_PATTERNS:
+        return manhattanHeuristic(state, problem)
+    positions = state.tilePositions()
+    total = 0
+    for database in getPatternDatabases(SLIDING_PUZZLE_PATTERNS[state.width], state.width):
+        total += database.getDistance(positions)
+    return total
+
+def manhattanHeuristic(state, problem=None):
+    """
+      The sum over the tiles of their Manhattan distances from home.
+
+    >>> manhattanHeuristic(SlidingPuzzleState([3, 1, 2, 0]))
+    2
+    """
+    width = len(state.cells)
+    total = 0
+    for row, tiles in enumerate(state.cells):
+        for col, tile in enumerate(tiles):
+            if tile != 0:
+                total += abs(tile // width - row) + abs(tile % width - col)
+    return total
+
 def loadEightPuzzle(puzzleNumber):
     """
       puzzleNumber: The number of the eight puzzle to load.
@@ -262,7 +606,107 @@ def createRandomEightPuzzle(moves=100):
         puzzle = puzzle.result(random.sample(puzzle.legalMoves(), 1)[0])
     return puzzle
 
+def createRandomSlidingPuzzle(width=4, moves=100, seed=None):
+    """
+      Creates a width x width puzzle by a walk of 'moves' random moves from
+    the goal, never undoing the move just made.  With the same seed the
+    same puzzle comes back.
+
+    >>> createRandomSlidingPuzzle(3, 30, seed=1) == createRandomSlidingPuzzle(3, 30, seed=1)
+    True
+    """
+    rng = random.Random(seed)
+    puzzle = SlidingPuzzleState(range(width * width))
+    previous = None
+    for i in range(moves):
+        choices = [next for next, move in puzzle.successors() if next != previous]
+        previous, puzzle = puzzle, rng.choice(choices)
+    return puzzle
+
+def createSolvableSlidingPuzzle(width=4, seed=None):
+    """
+      Creates a width x width puzzle drawn uniformly from all the solvable
+    boards.  Half of all orderings are solvable, and swapping the first two
+    tiles of an unsolvable one pairs it with a unique solvable one.
+    """
+    rng = random.Random(seed)
+    numbers = range(width * width)
+    rng.shuffle(numbers)
+    if not isSolvable(numbers):
+        i, j = [cell for cell in range(len(numbers)) if numbers[cell] != 0][:2]
+        numbers[i], numbers[j] = numbers[j], numbers[i]
+    return SlidingPuzzleState(numbers)
+
+def runBenchmark(puzzles, algorithms=('astar', 'idastar'), heuristic=None):
+    """
+      Solves each puzzle with each search function named in algorithms (any
+    function in search.py) and prints, and returns, a row per run:
+    (puzzle number, algorithm, moves found, optimal moves, nodes expanded,
+    seconds).  puzzles is a list of (numbers, optimal moves) pairs, like
+    FIFTEEN_PUZZLE_DATA; the optimal count may be None.
+    """
+    import time
+    if heuristic is None: heuristic = patternDatabaseHeuristic
+    rows = []
+    print('%6s %-24s %6s %8s %10s %9s' % ('puzzle', 'algorithm', 'moves', 'optimal', 'expanded', 'seconds'))
+    for number, (numbers, optimal) in enumerate(puzzles):
+        for name in algorithms:
+            func = getattr(search, name)
+            problem = EightPuzzleSearchProblem(SlidingPuzzleState(numbers))
+            if 'heuristic' in func.func_code.co_varnames:
+                heuristic(problem.getStartState(), problem) # build any tables up front
+                start = time.time()
+                path = func(problem, heuristic=heuristic)
+            else:
+                start = time.time()
+                path = func(problem)
+            seconds = time.time() - start
+            moves = None
+            if path is not None: moves = len(path)
+            rows.append((number, name, moves, optimal, problem._expanded, seconds))
+            print('%6d %-24s %6s %8s %10d %9.3f' % rows[-1])
+    return rows
+
+def readCommand(argv):
+    from optparse import OptionParser
+    usageStr = """
+    USAGE:      python eightpuzzle.py <options>
+    EXAMPLES:   (1) python eightpuzzle.py
+                    - steps through a BFS solution of a random eight puzzle
+                (2) python eightpuzzle.py --benchmark -a astar,wastar,idastar
+                    - solves the 15-puzzle corpus with each algorithm
+                (3) python eightpuzzle.py --benchmark --random -n 3 -a wastar,beam
+                    - solves three uniformly random 15-puzzles
+    """
+    parser = OptionParser(usageStr)
+    parser.add_option('-b', '--benchmark', action='store_true', dest='benchmark', default=False,
+                      help='Run the search algorithms over FIFTEEN_PUZZLE_DATA')
+    parser.add_option('-a', '--algorithms', dest='algorithms', default='astar,idastar',
+                      help='Comma separated search.py functions to benchmark [Default: %default]')
+    parser.add_option('-e', '--heuristic', dest='heuristic', default='patternDatabaseHeuristic',
+                      help='The heuristic to benchmark with [Default: %default]')
+    parser.add_option('-n', '--numPuzzles', dest='numPuzzles', type='int', default=len(FIFTEEN_PUZZLE_DATA),
+                      help='How many puzzles of the corpus to run [Default: %default]')
+    parser.add_option('-r', '--random', action='store_true', dest='random', default=False,
+                      help='Benchmark uniformly random solvable boards (seeds 0, 1, ...) instead of the corpus')
+    parser.add_option('-w', '--width', dest='width', type='int', default=4,
+                      help='The width of the --random boards [Default: %default]')
+    options, otherjunk = parser.parse_args(argv)
+    if len(otherjunk) != 0:
+        raise Exception('Command line input not understood: ' + str(otherjunk))
+    return options
+
 if __name__ == '__main__':
+    import sys
+    options = readCommand(sys.argv[1:])
+    if options.benchmark:
+        puzzles = FIFTEEN_PUZZLE_DATA[:options.numPuzzles]
+        if options.random:
+            puzzles = [(createSolvableSlidingPuzzle(options.width, seed).numbers(), None)
+                       for seed in range(options.numPuzzles)]
+        runBenchmark(puzzles, options.algorithms.split(','), globals()[options.heuristic])
+        sys.exit(0)
+
     puzzle = createRandomEightPuzzle(25)
     print('A random puzzle:')
     print(puzzle)
@@ -67,18 +67,41 @@ class Directions:
                WEST: EAST,
                STOP: STOP}
 
-class Configuration:
+class Configuration(object):
     """
     A Configuration holds the (x,y) coordinate of a character, along with its
     traveling direction.
 
     The convention for positions, like a graph, is that (0,0) is the lower left corner, x increases
     horizontally and y increases vertically.  Therefore, north is the direction of increasing y, or (0,1).
+
+    Configurations are immutable.  Those lying on the integer grid are interned
+    with integer coordinates, so there is a single shared object per
+    (position, direction) pair; each one also remembers the successors it has
+    generated, so moving an agent is usually a single dictionary lookup.
     """
+    __slots__ = ('pos', 'direction', '_hash', '_successors')
+
+    def __new__(cls, pos, direction):
+        x, y = pos
+        x_int, y_int = int(x), int(y)
+        if x == x_int and y == y_int:
+            key = (x_int, y_int, direction)
+            config = _INTERNED_CONFIGURATIONS.get(key)
+            if config is None:
+                config = _makeConfiguration(cls, (x_int, y_int), direction, {})
+                _INTERNED_CONFIGURATIONS[key] = config
+            return config
+        return _makeConfiguration(cls, pos, direction, None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Configuration objects are immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('Configuration objects are immutable')
 
-    def __init__(self, pos, direction):
-        self.pos = pos
-        self.direction = direction
+    def __reduce__(self):
+        return (Configuration, (self.pos, self.direction))
 
     def getPosition(self):
         return (self.pos)
@@ -87,17 +110,18 @@ class Configuration:
         return self.direction
 
     def isInteger(self):
-        x,y = self.pos
-        return x == int(x) and y == int(y)
+        return self._successors is not None
 
     def __eq__(self, other):
-        if other == None: return False
+        if self is other: return True
+        if other is None: return False
         return (self.pos == other.pos and self.direction == other.direction)
 
+    def __ne__(self, other):
+        return not self == other
+
     def __hash__(self):
-        x = hash(self.pos)
-        y = hash(self.direction)
-        return hash(x + 13 * y)
+        return self._hash
 
     def __str__(self):
         return "(x,y)="+str(self.pos)+", "+str(self.direction)
@@ -110,25 +134,59 @@ class Configuration:
 
         Actions are movement vectors.
         """
+        successors = self._successors
+        if successors is not None:
+            config = successors.get(vector)
+            if config is not None: return config
         x, y= self.pos
         dx, dy = vector
         direction = Actions.vectorToDirection(vector)
         if direction == Directions.STOP:
             direction = self.direction # There is no stop direction
-        return Configuration((x + dx, y+dy), direction)
-
-class AgentState:
+        config = Configuration((x + dx, y+dy), direction)
+        if successors is not None: successors[vector] = config
+        return config
+
+_INTERNED_CONFIGURATIONS = {}
+
+def _makeConfiguration(cls, pos, direction, successors):
+    "Builds a Configuration without going through the interning in __new__."
+    config = object.__new__(cls)
+    setField = object.__setattr__
+    setField(config, 'pos', pos)
+    setField(config, 'direction', direction)
+    setField(config, '_hash', hash(hash(pos) + 13 * hash(direction)))
+    setField(config, '_successors', successors)
+    return config
+
+class AgentState(object):
     """
     AgentStates hold the state of an agent (configuration, speed, scared, etc).
+
+    AgentStates are immutable, so successor game states share them rather than
+    copying one per agent.  The game rules build changed states with
+    withConfiguration and withScaredTimer.
     """
+    __slots__ = ('start', 'configuration', 'isPacman', 'scaredTimer', 'numCarrying', 'numReturned')
 
     def __init__( self, startConfiguration, isPacman ):
-        self.start = startConfiguration
-        self.configuration = startConfiguration
-        self.isPacman = isPacman
-        self.scaredTimer = 0
-        self.numCarrying = 0
-        self.numReturned = 0
+        setField = object.__setattr__
+        setField(self, 'start', startConfiguration)
+        setField(self, 'configuration', startConfiguration)
+        setField(self, 'isPacman', isPacman)
+        setField(self, 'scaredTimer', 0)
+        setField(self, 'numCarrying', 0)
+        setField(self, 'numReturned', 0)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('AgentState objects are immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('AgentState objects are immutable')
+
+    def __reduce__(self):
+        return (_rebuildAgentState, (self.start, self.isPacman, self.configuration,
+                                     self.scaredTimer, self.numCarrying, self.numReturned))
 
     def __str__( self ):
         if self.isPacman:
@@ -137,20 +195,32 @@ class AgentState:
             return "Ghost: " + str( self.configuration )
 
     def __eq__( self, other ):
-        if other == None:
+        if self is other:
+            return True
+        if other is None:
             return False
         return self.configuration == other.configuration and self.scaredTimer == other.scaredTimer
 
+    def __ne__( self, other ):
+        return not self == other
+
     def __hash__(self):
         return hash(hash(self.configuration) + 13 * hash(self.scaredTimer))
 
     def copy( self ):
-        state = AgentState( self.start, self.isPacman )
-        state.configuration = self.configuration
-        state.scaredTimer = self.scaredTimer
-        state.numCarrying = self.numCarrying
-        state.numReturned = self.numReturned
-        return state
+        return self
+
+    def withConfiguration( self, configuration ):
+        "Returns a copy of this state moved to the given configuration."
+        if configuration is self.configuration: return self
+        return _rebuildAgentState(self.start, self.isPacman, configuration,
+                                  self.scaredTimer, self.numCarrying, self.numReturned)
+
+    def withScaredTimer( self, scaredTimer ):
+        "Returns a copy of this state with the given scared timer."
+        if scaredTimer == self.scaredTimer: return self
+        return _rebuildAgentState(self.start, self.isPacman, self.configuration,
+                                  scaredTimer, self.numCarrying, self.numReturned)
 
     def getPosition(self):
         if self.configuration == None: return None
@@ -159,6 +229,17 @@ class AgentState:
     def getDirection(self):
         return self.configuration.getDirection()
 
+def _rebuildAgentState(start, isPacman, configuration, scaredTimer, numCarrying, numReturned):
+    state = object.__new__(AgentState)
+    setField = object.__setattr__
+    setField(state, 'start', start)
+    setField(state, 'configuration', configuration)
+    setField(state, 'isPacman', isPacman)
+    setField(state, 'scaredTimer', scaredTimer)
+    setField(state, 'numCarrying', numCarrying)
+    setField(state, 'numReturned', numReturned)
+    return state
+
 class Grid:
     """
     A 2-dimensional array of objects backed by a list of lists.  Data is accessed
@@ -403,10 +484,8 @@ class GameStateData:
         return state
 
     def copyAgentStates( self, agentStates ):
-        copiedStates = []
-        for agentState in agentStates:
-            copiedStates.append( agentState.copy() )
-        return copiedStates
+        # AgentStates are immutable, so the list can share them
+        return agentStates[:]
 
     def __eq__( self, other ):
         """
@@ -14,10 +14,13 @@
 
 from util import manhattanDistance
 from game import Grid
+from array import array
 import os
 import random
 
 VISIBILITY_MATRIX_CACHE = {}
+LEGAL_ACTIONS_CACHE = {}
+SEARCH_GRAPH_CACHE = {}
 
 class Layout:
     """
@@ -35,6 +38,8 @@ class Layout:
         self.processLayoutText(layoutText)
         self.layoutText = layoutText
         self.totalFood = len(self.food.asList())
+        self.initializeLegalActions()
+        self.initializeSearchGraph()
         # self.initializeVisibilityMatrix()
 
     def getNumGhosts(self):
@@ -61,6 +66,139 @@ class Layout:
         else:
             self.visibility = VISIBILITY_MATRIX_CACHE[reduce(str.__add__, self.layoutText)]
 
+    def initializeLegalActions(self):
+        """
+        Precomputes the legal actions at every open grid cell.  Walls never
+        change during a game, so this is done once per layout text.
+
+        pacmanActions maps (x,y) to the tuple of actions Pacman may take there;
+        ghostActions maps (x,y) to a dict from the ghost's current direction to
+        the tuple of actions the ghost may take.  Cells on the edge of the
+        board are left out, as are off-grid positions, so callers fall back to
+        Actions.getPossibleActions for those.
+        """
+        global LEGAL_ACTIONS_CACHE
+        key = '\n'.join(self.layoutText)
+        if key not in LEGAL_ACTIONS_CACHE:
+            from game import Actions, Directions
+            pacmanActions, ghostActions = {}, {}
+            for x in range(1, self.width - 1):
+                for y in range(1, self.height - 1):
+                    if self.walls[x][y]: continue
+                    possible = tuple([dir for dir, (dx, dy) in Actions._directionsAsList
+                                      if not self.walls[x + dx][y + dy]])
+                    pacmanActions[(x, y)] = possible
+                    moves = [dir for dir in possible if dir != Directions.STOP]
+                    byDirection = {}
+                    for direction in Directions.REVERSE:
+                        reverse = Directions.REVERSE[direction]
+                        if reverse in moves and len(moves) > 1:
+                            byDirection[direction] = tuple([dir for dir in moves if dir != reverse])
+                        else:
+                            byDirection[direction] = tuple(moves)
+                    ghostActions[(x, y)] = byDirection
+            LEGAL_ACTIONS_CACHE[key] = (pacmanActions, ghostActions)
+        self.pacmanActions, self.ghostActions = LEGAL_ACTIONS_CACHE[key]
+
+    def initializeSearchGraph(self):
+        """
+        Indexes the open cells of the board for the search problems in
+        searchAgents.py, once per layout text.
+
+        cells lists the open (x,y) positions and cellIndex maps them back to
+        their index.  neighbors maps each open position to a tuple of
+        (action, nextPosition) pairs for the moves North, South, East and West
+        that don't run into a wall, in that order; neighborIndices holds the
+        same moves as (action, nextIndex) pairs, indexed by cell.  Distance
+        fields computed by distanceField are kept alongside.
+        """
+        global SEARCH_GRAPH_CACHE
+        key = '\n'.join(self.layoutText)
+        if key not in SEARCH_GRAPH_CACHE:
+            from game import Actions, Directions
+            moves = [(dir, Actions._directions[dir]) for dir in
+                     [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]]
+            cells = [(x, y) for x in range(self.width) for y in range(self.height) if not self.walls[x][y]]
+            cellIndex = dict([(pos, i) for i, pos in enumerate(cells)])
+            neighbors = {}
+            for x, y in cells:
+                neighbors[(x, y)] = tuple([(dir, (x + dx, y + dy)) for dir, (dx, dy) in moves
+                                           if (x + dx, y + dy) in cellIndex])
+            neighborIndices = [tuple([(dir, cellIndex[pos]) for dir, pos in neighbors[cell]]) for cell in cells]
+            adjacency = [tuple([j for dir, j in moves]) for moves in neighborIndices]
+            SEARCH_GRAPH_CACHE[key] = (cells, cellIndex, neighbors, neighborIndices, adjacency, {})
+        (self.cells, self.cellIndex, self.neighbors, self.neighborIndices,
+         self._adjacency, self._distanceFields) = SEARCH_GRAPH_CACHE[key]
+        self._wavefront = None
+
+    def distanceField(self, source):
+        """
+        Returns the maze distance from source to every open cell, as an array
+        of 16-bit ints indexed like self.cells (-1 for unreachable cells).
+
+        The field is computed by expanding the whole breadth-first wavefront
+        one layer at a time, and memoized per layout text, so the returned
+        array is shared and must not be modified.
+        """
+        start = self.cellIndex[source]
+        field = self._distanceFields.get(start)
+        if field is None:
+            adjacency = self._adjacency
+            field = array('h', [-1]) * len(self.cells)
+            field[start] = 0
+            frontier, distance = [start], 0
+            while frontier:
+                distance += 1
+                layer = []
+                for i in frontier:
+                    for j in adjacency[i]:
+                        if field[j] < 0:
+                            field[j] = distance
+                            layer.append(j)
+                frontier = layer
+            self._distanceFields[start] = field
+        return field
+
+    def getMazeDistance(self, pos1, pos2):
+        """
+        Returns the maze distance between two open cells, or -1 if pos2 can't
+        be reached from pos1.
+        """
+        return self.distanceField(pos1)[self.cellIndex[pos2]]
+
+    def getWavefront(self):
+        "Returns the Wavefront shared by all searches on this layout."
+        if self._wavefront is None:
+            self._wavefront = Wavefront(self)
+        return self._wavefront
+
+    def nearestTargets(self, sources, targets, k=1):
+        """
+        Returns the k targets closest to any of sources as (distance, (x,y))
+        pairs, nearest first, from a single breadth-first search; see
+        Wavefront.search for the arguments.
+        """
+        return self.getWavefront().search(sources, targets, k)
+
+    def targetDistances(self, sources, targets):
+        """
+        Returns a dict from each reachable target to its maze distance from
+        the nearest of sources, from a single breadth-first search.
+        """
+        return dict([(pos, distance) for distance, pos in self.getWavefront().search(sources, targets)])
+
+    def pathToNearestTarget(self, sources, targets):
+        """
+        Returns the actions of a shortest path from the nearest of sources
+        to the nearest target, or None if there is none.
+        Ties go to the target breadth-first search with moves in the order
+        North, South, East, West generates first.
+        """
+        wavefront = self.getWavefront()
+        found = wavefront.search(sources, targets, 1)
+        if not found: return None
+        return wavefront.pathTo(found[0][1])
+
     def isWall(self, pos):
         x, col = pos
         return self.walls[x][col]
@@ -128,6 +266,106 @@ class Layout:
         elif layoutChar in  ['1', '2', '3', '4']:
             self.agentPositions.append( (int(layoutChar), (x,y)))
             self.numGhosts += 1
+
+
+def _isPosition(sources):
+    "Whether sources is a single (x,y) position rather than a collection of them."
+    return len(sources) == 2 and isinstance(sources[0], (int, long, float))
+
+class Wavefront:
+    """
+    A breadth-first search over the open cells of a layout from one or more
+    sources, which stops as soon as it has reached the targets it was asked
+    for.  The visited marks, parents and distances live in arrays that are
+    kept from one search to the next: starting a search only bumps a stamp,
+    so a search costs no more than the cells it reaches.
+
+    After a search, pathTo and routeTo trace paths back from any cell it
+    reached.
+    """
+    def __init__(self, layout):
+        self.layout = layout
+        size = len(layout.cells)
+        self.stamps = array('l', [0]) * size
+        self.parents = array('l', [-1]) * size
+        self.distances = array('l', [0]) * size
+        self.stamp = 0
+
+    def search(self, sources, targets, k=None):
+        """
+        sources: an (x,y) position, or a list of them to search from at once
+        targets: a Grid of booleans, like the food, or a collection of (x,y)
+        k:       how many targets to stop after, or None for all of them
+
+        Returns (distance, (x,y)) pairs for the targets reached, in the order
+        found, so nearest first.
+        """
+        cells, cellIndex, adjacency = self.layout.cells, self.layout.cellIndex, self.layout._adjacency
+        stamps, parents, distances = self.stamps, self.parents, self.distances
+        self.stamp += 1
+        stamp = self.stamp
+        if hasattr(targets, 'data'):
+            data = targets.data
+            isTarget = lambda i: data[cells[i][0]][cells[i][1]]
+        else:
+            wanted = set([cellIndex[pos] for pos in targets if pos in cellIndex])
+            isTarget = wanted.__contains__
+
+        if _isPosition(sources): sources = [sources]
+        found = []
+        frontier = []
+        for source in sources:
+            i = cellIndex[source]
+            if stamps[i] == stamp: continue
+            stamps[i], parents[i], distances[i] = stamp, -1, 0
+            frontier.append(i)
+            if isTarget(i):
+                found.append((0, source))
+        if k is not None and len(found) >= k: return found[:k]
+
+        distance = 0
+        while frontier:
+            distance += 1
+            layer = []
+            for i in frontier:
+                for j in adjacency[i]:
+                    if stamps[j] != stamp:
+                        stamps[j], parents[j], distances[j] = stamp, i, distance
+                        layer.append(j)
+                        if isTarget(j):
+                            found.append((distance, cells[j]))
+                            if k is not None and len(found) >= k: return found
+            frontier = layer
+        return found
+
+    def getDistance(self, pos):
+        "The distance the last search found to pos, or None if it wasn't reached."
+        i = self.layout.cellIndex[pos]
+        if self.stamps[i] != self.stamp: return None
+        return self.distances[i]
+
+    def routeTo(self, pos):
+        """
+        Returns the (action, (x,y)) steps from the source of the last search
+        to pos, which that search must have reached.
+        """
+        cells, neighborIndices = self.layout.cells, self.layout.neighborIndices
+        parents = self.parents
+        route = []
+        j = self.layout.cellIndex[pos]
+        while parents[j] >= 0:
+            i = parents[j]
+            for action, k in neighborIndices[i]:
+                if k == j: break
+            route.append((action, cells[j]))
+            j = i
+        route.reverse()
+        return route
+
+    def pathTo(self, pos):
+        "Returns the actions of routeTo(pos)."
+        return [action for action, cell in self.routeTo(pos)]
+
 def getLayout(name, back = 2):
     if name.endswith('.lay'):
         layout = tryToLoad('layouts/' + name)
@@ -43,6 +43,7 @@ from game import GameStateData
 from game import Game
 from game import Directions
 from game import Actions
+from game import Configuration
 from util import nearestPoint
 from util import manhattanDistance
 import util, layout
@@ -112,7 +113,8 @@ class GameState:
         if agentIndex == 0:
             state.data.scoreChange += -TIME_PENALTY # Penalty for waiting around
         else:
-            GhostRules.decrementTimer( state.data.agentStates[agentIndex] )
+            agentStates = state.data.agentStates
+            agentStates[agentIndex] = GhostRules.decrementTimer( agentStates[agentIndex] )
 
         # Resolve multi-agent effects
         GhostRules.checkDeath( state, agentIndex )
@@ -331,14 +333,26 @@ class PacmanRules:
         """
         Returns a list of possible actions.
         """
-        return Actions.getPossibleActions( state.getPacmanState().configuration, state.data.layout.walls )
+        return list( PacmanRules._possibleActions( state ) )
     getLegalActions = staticmethod( getLegalActions )
 
+    def _possibleActions( state ):
+        """
+        Returns the possible actions, looked up in the layout's table when
+        Pacman is on a grid cell.  The result may be shared; don't modify it.
+        """
+        conf = state.data.agentStates[0].configuration
+        possible = state.data.layout.pacmanActions.get( conf.pos )
+        if possible is None:
+            return Actions.getPossibleActions( conf, state.data.layout.walls )
+        return possible
+    _possibleActions = staticmethod( _possibleActions )
+
     def applyAction( state, action ):
         """
         Edits the state to reflect the results of the action.
         """
-        legal = PacmanRules.getLegalActions( state )
+        legal = PacmanRules._possibleActions( state )
         if action not in legal:
             raise Exception("Illegal action " + str(action))
 
@@ -346,7 +360,8 @@ class PacmanRules:
 
         # Update Configuration
         vector = Actions.directionToVector( action, PacmanRules.PACMAN_SPEED )
-        pacmanState.configuration = pacmanState.configuration.generateSuccessor( vector )
+        pacmanState = pacmanState.withConfiguration( pacmanState.configuration.generateSuccessor( vector ) )
+        state.data.agentStates[0] = pacmanState
 
         # Eat
         next = pacmanState.configuration.getPosition()
@@ -374,8 +389,9 @@ class PacmanRules:
             state.data.capsules.remove( position )
             state.data._capsuleEaten = position
             # Reset all ghosts' scared timers
-            for index in range( 1, len( state.data.agentStates ) ):
-                state.data.agentStates[index].scaredTimer = SCARED_TIME
+            agentStates = state.data.agentStates
+            for index in range( 1, len( agentStates ) ):
+                agentStates[index] = agentStates[index].withScaredTimer( SCARED_TIME )
     consume = staticmethod( consume )
 
 class GhostRules:
@@ -388,7 +404,19 @@ class GhostRules:
         Ghosts cannot stop, and cannot turn around unless they
         reach a dead end, but can turn 90 degrees at intersections.
         """
+        return list( GhostRules._possibleActions( state, ghostIndex ) )
+    getLegalActions = staticmethod( getLegalActions )
+
+    def _possibleActions( state, ghostIndex ):
+        """
+        Returns the legal ghost actions, looked up in the layout's table unless
+        the ghost is between grid cells (scared ghosts move at half speed).
+        The result may be shared; don't modify it.
+        """
         conf = state.getGhostState( ghostIndex ).configuration
+        byDirection = state.data.layout.ghostActions.get( conf.pos )
+        if byDirection is not None:
+            return byDirection[conf.direction]
         possibleActions = Actions.getPossibleActions( conf, state.data.layout.walls )
         reverse = Actions.reverseDirection( conf.direction )
         if Directions.STOP in possibleActions:
@@ -396,11 +424,11 @@ class GhostRules:
         if reverse in possibleActions and len( possibleActions ) > 1:
             possibleActions.remove( reverse )
         return possibleActions
-    getLegalActions = staticmethod( getLegalActions )
+    _possibleActions = staticmethod( _possibleActions )
 
     def applyAction( state, action, ghostIndex):
 
-        legal = GhostRules.getLegalActions( state, ghostIndex )
+        legal = GhostRules._possibleActions( state, ghostIndex )
         if action not in legal:
             raise Exception("Illegal ghost action " + str(action))
 
@@ -408,14 +436,19 @@ class GhostRules:
         speed = GhostRules.GHOST_SPEED
         if ghostState.scaredTimer > 0: speed /= 2.0
         vector = Actions.directionToVector( action, speed )
-        ghostState.configuration = ghostState.configuration.generateSuccessor( vector )
+        state.data.agentStates[ghostIndex] = ghostState.withConfiguration( ghostState.configuration.generateSuccessor( vector ) )
     applyAction = staticmethod( applyAction )
 
     def decrementTimer( ghostState):
+        """
+        Returns the ghost state one tick later.
+        """
         timer = ghostState.scaredTimer
+        if timer == 0: return ghostState
         if timer == 1:
-            ghostState.configuration.pos = nearestPoint( ghostState.configuration.pos )
-        ghostState.scaredTimer = max( 0, timer - 1 )
+            conf = ghostState.configuration
+            ghostState = ghostState.withConfiguration( Configuration( nearestPoint( conf.pos ), conf.direction ) )
+        return ghostState.withScaredTimer( timer - 1 )
     decrementTimer = staticmethod( decrementTimer )
 
     def checkDeath( state, agentIndex):
@@ -436,8 +469,7 @@ class GhostRules:
     def collide( state, ghostState, agentIndex):
         if ghostState.scaredTimer > 0:
             state.data.scoreChange += 200
-            GhostRules.placeGhost(state, ghostState)
-            ghostState.scaredTimer = 0
+            GhostRules.placeGhost(state, ghostState.withScaredTimer(0), agentIndex)
             # Added for first-person
             state.data._eaten[agentIndex] = True
         else:
@@ -450,8 +482,8 @@ class GhostRules:
         return manhattanDistance( ghostPosition, pacmanPosition ) <= COLLISION_TOLERANCE
     canKill = staticmethod( canKill )
 
-    def placeGhost(state, ghostState):
-        ghostState.configuration = ghostState.start
+    def placeGhost(state, ghostState, agentIndex):
+        state.data.agentStates[agentIndex] = ghostState.withConfiguration(ghostState.start)
     placeGhost = staticmethod( placeGhost )
 
 #############################
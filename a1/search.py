@@ -49,6 +49,11 @@ class SearchProblem:
         action, stepCost), where 'successor' is a successor to the current
         state, 'action' is the action required to get there, and 'stepCost' is
         the incremental cost of expanding to that successor.
+
+        A problem may also define iterSuccessors(state), generating the same
+        triples one at a time.  The search functions below use it when it is
+        there, so successors that are never looked at are never built, and
+        breadth-first search then tests for the goal as nodes are generated.
         """
         util.raiseNotDefined()
 
@@ -62,6 +67,135 @@ class SearchProblem:
         util.raiseNotDefined()
 
 
+# When a list, every search appends the asDict() of its SearchStatistics
+STATISTICS_LOG = None
+
+class SearchStatistics:
+    """
+    Counters that every search function below fills in as it runs, and leaves
+    on the problem as problem.searchStatistics:
+
+      expanded      calls to getSuccessors
+      generated     successors returned by those calls
+      duplicates    successors dropped because their state was already
+                    reached at least as cheaply
+      maxFrontier   the most nodes waiting on the open list at once
+      pathLength    the number of actions returned (None if no path)
+      wallTime, cpuTime
+                    seconds between the start and end of the search
+      peakMemory    bytes; the tracemalloc peak when tracemalloc is tracing,
+                    or else the peak resident size of the whole process
+
+    The effective branching factor, from branchingFactor(), is the b for
+    which a uniform tree as deep as the path would have generated as many
+    nodes.
+    """
+    def __init__(self, algorithm, problem=None):
+        import os, time
+        self.algorithm = algorithm
+        self.problem = problem.__class__.__name__
+        self.expanded = 0
+        self.generated = 0
+        self.duplicates = 0
+        self.maxFrontier = 0
+        self.pathLength = None
+        self.pathCost = None # filled in by callers that know it, like SearchAgent
+        self.wallTime = self.cpuTime = 0.0
+        self.peakMemory = None
+        self._startTime = time.time()
+        self._startCpu = sum(os.times()[:2])
+
+    def expand(self, problem, state):
+        """
+        Returns the successors of state, counting the expansion: a lazy
+        iterator if the problem has iterSuccessors, or else the list from
+        getSuccessors.
+        """
+        self.expanded += 1
+        iterSuccessors = getattr(problem, 'iterSuccessors', None)
+        if iterSuccessors is None:
+            successors = problem.getSuccessors(state)
+            self.generated += len(successors)
+            return successors
+        return self._countGenerated(iterSuccessors(state))
+
+    def expandBatch(self, problem, states):
+        "Returns getSuccessorsBatch(states), counting every expansion."
+        batch = problem.getSuccessorsBatch(states)
+        self.expanded += len(states)
+        self.generated += sum([len(successors) for successors in batch])
+        return batch
+
+    def _countGenerated(self, successors):
+        for successor in successors:
+            self.generated += 1
+            yield successor
+
+    def noteFrontier(self, size):
+        if size > self.maxFrontier: self.maxFrontier = size
+
+    def finish(self, path):
+        "Records the end of the search; returns path for the search to return."
+        import os, time
+        self.wallTime = time.time() - self._startTime
+        self.cpuTime = sum(os.times()[:2]) - self._startCpu
+        self.pathLength = None
+        if path is not None: self.pathLength = len(path)
+        self.peakMemory = _peakMemory()
+        if STATISTICS_LOG is not None:
+            STATISTICS_LOG.append(self.asDict())
+        return path
+
+    def branchingFactor(self):
+        depth = self.pathLength
+        if not depth or self.generated < depth: return None
+        # b ** depth alone reaches generated at this high, and no b below it
+        # can overflow
+        low, high = 1.0, float(self.generated) ** (1.0 / depth)
+        for i in range(60):
+            b = (low + high) / 2
+            if sum([b ** d for d in range(1, depth + 1)]) > self.generated:
+                high = b
+            else:
+                low = b
+        return (low + high) / 2
+
+    def asDict(self):
+        keys = ['algorithm', 'problem', 'expanded', 'generated', 'duplicates', 'maxFrontier',
+                'pathLength', 'pathCost', 'wallTime', 'cpuTime', 'peakMemory']
+        result = dict([(key, getattr(self, key)) for key in keys])
+        result['branchingFactor'] = self.branchingFactor()
+        return result
+
+    def __str__(self):
+        "A one line summary, as SearchAgent prints it"
+        factor = self.branchingFactor()
+        if factor is None: factor = '-'
+        else: factor = '%.3f' % factor
+        return ('%s: %d expanded, %d generated, %d duplicates, frontier peak %d, '
+                'branching factor %s, %.3fs wall, %.3fs cpu' %
+                (self.algorithm, self.expanded, self.generated, self.duplicates,
+                 self.maxFrontier, factor, self.wallTime, self.cpuTime))
+
+def _peakMemory():
+    try:
+        import tracemalloc
+        if tracemalloc.is_tracing():
+            return tracemalloc.get_traced_memory()[1]
+    except ImportError:
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 # kilobytes on Linux
+    except ImportError:
+        return None
+
+def startStatistics(problem, algorithm):
+    "Creates the SearchStatistics for a search of problem and attaches them to it."
+    stats = SearchStatistics(algorithm, problem)
+    problem.searchStatistics = stats
+    return stats
+
 def tinyMazeSearch(problem):
     """
     Returns a sequence of moves that solves tinyMaze.  For any other maze, the
@@ -87,37 +221,95 @@ def depthFirstSearch(problem):
     print "Start's successors:", problem.getSuccessors(problem.getStartState())
     """
     from util import Stack
+    stats = startStatistics(problem, 'depthFirstSearch')
     open = Stack()
     start = problem.getStartState()
     open.push((start, [], [start]))
     while not open.isEmpty():
         n = open.pop()
         if problem.isGoalState(n[0]):
-            return n[1]
-        for succ in problem.getSuccessors(n[0]):
+            return stats.finish(n[1])
+        for succ in stats.expand(problem, n[0]):
             if not succ[0] in n[2]:
                 #n[2].append(succ[0])
                 #open.push((succ[0], n[1] + [succ[1]], n[2]))
                 open.push((succ[0], n[1] + [succ[1]], n[2] + [succ[0]]))
+            else:
+                stats.duplicates += 1
+        stats.noteFrontier(len(open.list))
+    return stats.finish(None)
 
 def breadthFirstSearch(problem):
-    """Search the shallowest nodes in the search tree first."""
+    """
+    Search the shallowest nodes in the search tree first.
+
+    For problems with iterSuccessors, nodes are tested for the goal as they
+    are generated rather than when expanded, which finds a path of the same
+    length without expanding the rest of the layer before it.
+
+    Problems with getSuccessorsBatch have each layer of the frontier
+    expanded with one call, still testing for the goal on generation.  The
+    path is the same, but the whole layer holding the goal's parent is
+    expanded, so expansion counts fall between the two:
+
+                                   goal on      goal on generation
+                                   expansion    node by node   by layer
+      bigMaze, position              620           617            619
+      mediumCorners, corners        1966          1921           1936
+    """
     from util import Queue
+    stats = startStatistics(problem, 'breadthFirstSearch')
+    if getattr(problem, 'getSuccessorsBatch', None) is not None:
+        return _breadthFirstLayers(problem, stats)
+    goalOnGeneration = getattr(problem, 'iterSuccessors', None) is not None
     open = Queue()
     start = problem.getStartState()
-    open.push((start, [], [start]))
+    if goalOnGeneration and problem.isGoalState(start):
+        return stats.finish([])
+    visited = set([start])
+    open.push((start, []))
     while not open.isEmpty():
-        n = open.pop()
-        if problem.isGoalState(n[0]):
-            return n[1]
-        for succ in problem.getSuccessors(n[0]):
-            if not succ[0] in n[2]:
-                n[2].append(succ[0])
-                open.push((succ[0], n[1] + [succ[1]], n[2]))
+        state, path = open.pop()
+        if not goalOnGeneration and problem.isGoalState(state):
+            return stats.finish(path)
+        for succ, action, stepCost in stats.expand(problem, state):
+            if succ in visited:
+                stats.duplicates += 1
+                continue
+            visited.add(succ)
+            if goalOnGeneration and problem.isGoalState(succ):
+                return stats.finish(path + [action])
+            open.push((succ, path + [action]))
+        stats.noteFrontier(len(open.list))
+    return stats.finish(None)
+
+def _breadthFirstLayers(problem, stats):
+    "breadthFirstSearch, expanding a layer at a time through getSuccessorsBatch"
+    start = problem.getStartState()
+    if problem.isGoalState(start):
+        return stats.finish([])
+    visited = set([start])
+    layer = [(start, [])]
+    while layer:
+        stats.noteFrontier(len(layer))
+        batch = stats.expandBatch(problem, [state for state, path in layer])
+        nextLayer = []
+        for (state, path), successors in zip(layer, batch):
+            for succ, action, stepCost in successors:
+                if succ in visited:
+                    stats.duplicates += 1
+                    continue
+                visited.add(succ)
+                if problem.isGoalState(succ):
+                    return stats.finish(path + [action])
+                nextLayer.append((succ, path + [action]))
+        layer = nextLayer
+    return stats.finish(None)
 
 def uniformCostSearch(problem):
     """Search the node of least total cost first."""
     from util import PriorityQueueWithFunction
+    stats = startStatistics(problem, 'uniformCostSearch')
     costFn = lambda n: n[3]
     open = PriorityQueueWithFunction(costFn)
     start = problem.getStartState()
@@ -126,11 +318,15 @@ def uniformCostSearch(problem):
         n = open.pop()
         if n[3] <= n[2][n[0]]:
             if problem.isGoalState(n[0]):
-                return n[1]
-            for succ in problem.getSuccessors(n[0]):
+                return stats.finish(n[1])
+            for succ in stats.expand(problem, n[0]):
                 if not succ[0] in n[2] or n[3]+succ[2] < n[2][succ[0]]:
                     open.push((succ[0], n[1]+[succ[1]], n[2], n[3]+succ[2]))
                     n[2][succ[0]] = n[3]+succ[2]
+                else:
+                    stats.duplicates += 1
+            stats.noteFrontier(len(open.heap))
+    return stats.finish(None)
 
 def nullHeuristic(state, problem=None):
     """
@@ -142,6 +338,7 @@ def nullHeuristic(state, problem=None):
 def aStarSearch(problem, heuristic=nullHeuristic):
     """Search the node that has the lowest combined cost and heuristic first."""
     from util import PriorityQueue
+    stats = startStatistics(problem, 'aStarSearch')
     open = PriorityQueue()
     start = problem.getStartState()
     cost = heuristic(start, problem)
@@ -150,15 +347,396 @@ def aStarSearch(problem, heuristic=nullHeuristic):
         n = open.pop()
         if n[3] <= n[2][n[0]]:
             if problem.isGoalState(n[0]):
-                return n[1]
-            for succ in problem.getSuccessors(n[0]):
+                return stats.finish(n[1])
+            for succ in stats.expand(problem, n[0]):
                 cost = n[3]+succ[2]+heuristic(succ[0], problem)
                 if not succ[0] in n[2] or cost < n[2][succ[0]]:
                     open.push((succ[0], n[1]+[succ[1]], n[2], n[3]+succ[2]), cost)
                     n[2][succ[0]] = cost
+                else:
+                    stats.duplicates += 1
+            stats.noteFrontier(len(open.heap))
+    return stats.finish(None)
+
+def weightedAStarSearch(problem, heuristic=nullHeuristic, weight=2.0):
+    """
+    Search the node with the lowest g + weight * h first.  With an admissible
+    heuristic the path found costs at most weight times the optimal cost,
+    usually after far fewer expansions than A*.
+    """
+    search = _InflatedSearch(problem, heuristic, 'weightedAStarSearch')
+    search.improvePath(weight)
+    return search.stats.finish(search.bestPath)
+
+def beamSearch(problem, heuristic=nullHeuristic, width=100):
+    """
+    Breadth-first search that keeps only the width nodes with the lowest
+    g + h in each layer.  Memory is bounded by the beam width, but the search
+    is neither optimal nor complete: it returns None if the beam dies out.
+    """
+    import heapq
+    stats = startStatistics(problem, 'beamSearch')
+    start = problem.getStartState()
+    layer = [(0, start, [])]
+    visited = set([start])
+    while layer:
+        for cost, state, path in layer:
+            if problem.isGoalState(state):
+                return stats.finish(path)
+        candidates = []
+        for cost, state, path in layer:
+            for succ, action, stepCost in stats.expand(problem, state):
+                if succ not in visited:
+                    visited.add(succ)
+                    g = cost + stepCost
+                    candidates.append((g + heuristic(succ, problem), len(candidates), (g, succ, path + [action])))
+                else:
+                    stats.duplicates += 1
+        stats.noteFrontier(len(candidates))
+        layer = [n for f, i, n in heapq.nsmallest(width, candidates)]
+    return stats.finish(None)
+
+def anytimeRepairingAStarSolutions(problem, heuristic=nullHeuristic, weight=3.0, decrement=0.5, timeLimit=None):
+    """
+    Generates successively better solutions with Anytime Repairing A*
+    (Likhachev, Gordon and Thrun, 2003).  Each round is a weighted A* search
+    that reuses the work of the previous round, with the weight lowered by
+    decrement down to 1.  Yields (bound, path) pairs, where the path costs
+    at most bound times the optimal cost; the last one is optimal when the
+    heuristic is consistent.
+
+    With a timeLimit in seconds, the search stops once it runs out of time,
+    but only after the first solution has been found.  The statistics are
+    finished once, with the best path, when the generator ends or is closed.
+    """
+    import time
+    deadline = None
+    if timeLimit is not None: deadline = time.time() + timeLimit
+    search = _InflatedSearch(problem, heuristic, 'anytimeRepairingAStar')
+    try:
+        while True:
+            finished = search.improvePath(weight, deadline)
+            if search.bestPath is None: return
+            if not finished: return
+            yield search.suboptimalityBound(weight), search.bestPath
+            if weight <= 1: return
+            weight = max(1.0, weight - decrement)
+            search.startRound()
+    finally:
+        search.stats.finish(search.bestPath)
+
+def anytimeRepairingAStar(problem, heuristic=nullHeuristic, weight=3.0, decrement=0.5, timeLimit=10.0):
+    """
+    Runs Anytime Repairing A* until the weight reaches 1 or timeLimit seconds
+    have passed, and returns the best path found.
+    """
+    bestPath = None
+    for bound, path in anytimeRepairingAStarSolutions(problem, heuristic, weight, decrement, timeLimit):
+        bestPath = path
+    return bestPath
+
+class _InflatedSearch:
+    """
+    The search state shared by weighted A* and ARA*: best known costs and
+    paths, the open list ordered by g + weight * h, the closed set of the
+    current round and the states that improved after being closed.
+    """
+    def __init__(self, problem, heuristic, algorithm):
+        from util import PriorityQueue
+        self.stats = startStatistics(problem, algorithm)
+        self.problem = problem
+        self.heuristic = heuristic
+        self.start = problem.getStartState()
+        self.g = {self.start: 0}
+        self.h = {}
+        self.paths = {self.start: []}
+        self.open = PriorityQueue()
+        self.openStates = set([self.start])
+        self.closed = set()
+        self.incons = set()
+        self.bestCost, self.bestPath = None, None
+        self.weight = None
+
+    def getHeuristic(self, state):
+        if state not in self.h:
+            self.h[state] = self.heuristic(state, self.problem)
+        return self.h[state]
+
+    def push(self, state):
+        self.openStates.add(state)
+        self.open.push((state, self.g[state]), self.g[state] + self.weight * self.getHeuristic(state))
+
+    def startRound(self):
+        "Moves the improved closed states back to the open list for the next round."
+        self.openStates |= self.incons
+        self.incons = set()
+        self.closed = set()
+        self.weight = None
+
+    def improvePath(self, weight, deadline=None):
+        """
+        Expands states until no open state can improve on the best solution.
+        Returns False if it stopped early because the deadline passed after
+        a solution had been found.
+        """
+        import time
+        from util import PriorityQueue
+        if weight != self.weight:
+            self.weight = weight
+            self.open = PriorityQueue()
+            for state in self.openStates:
+                self.push(state)
+        problem, g = self.problem, self.g
+        while not self.open.isEmpty():
+            if deadline is not None and self.bestPath is not None and time.time() > deadline:
+                return False
+            state, cost = self.open.pop()
+            if state in self.closed or cost != g[state]:
+                continue # a stale entry
+            if self.bestCost is not None and cost + weight * self.getHeuristic(state) >= self.bestCost:
+                self.push(state)
+                return True
+            self.openStates.discard(state)
+            if problem.isGoalState(state):
+                if self.bestCost is None or cost < self.bestCost:
+                    self.bestCost, self.bestPath = cost, self.paths[state]
+                return True
+            self.closed.add(state)
+            path = self.paths[state]
+            for succ, action, stepCost in self.stats.expand(problem, state):
+                if succ not in g or cost + stepCost < g[succ]:
+                    g[succ] = cost + stepCost
+                    self.paths[succ] = path + [action]
+                    if succ in self.closed:
+                        self.incons.add(succ)
+                    else:
+                        self.push(succ)
+                else:
+                    self.stats.duplicates += 1
+            self.stats.noteFrontier(len(self.openStates))
+        return True
+
+    def suboptimalityBound(self, weight):
+        """
+        Returns a bound on how far the best solution is from optimal.  The
+        goal left the open list when it was reached, so its g + h, the best
+        cost, joins the open and inconsistent states in the lower bound.
+        """
+        if self.bestCost == 0: return 1.0
+        lowest = min([self.bestCost] + [self.g[s] + self.getHeuristic(s) for s in self.openStates | self.incons])
+        if lowest <= 0: return weight
+        return min(weight, self.bestCost / float(lowest))
+
+def iterativeDeepeningAStar(problem, heuristic=nullHeuristic, nodeLimit=None):
+    """
+    IDA* (Korf, 1985): a series of depth-first searches bounded by
+    f = g + h, each raising the bound to the smallest f that went over the
+    last one.  Memory only grows with the length of the current path, and
+    only cycles along that path are pruned, so states may be expanded many
+    times.  Optimal with an admissible heuristic.
+
+    Returns None if there is no solution, or if nodeLimit expansions (calls
+    to getSuccessors, over all iterations) pass without one.
+    """
+    stats = startStatistics(problem, 'iterativeDeepeningAStar')
+    start = problem.getStartState()
+    if problem.isGoalState(start):
+        return stats.finish([])
+    bound = heuristic(start, problem)
+    while True:
+        nextBound = None
+        actions = []
+        onPath = set([start])
+        stack = [(start, 0, iter(stats.expand(problem, start)))]
+        while stack:
+            state, cost, successors = stack[-1]
+            for succ, action, stepCost in successors:
+                if succ in onPath:
+                    stats.duplicates += 1
+                    continue
+                f = cost + stepCost + heuristic(succ, problem)
+                if f > bound:
+                    if nextBound is None or f < nextBound: nextBound = f
+                    continue
+                if problem.isGoalState(succ):
+                    return stats.finish(actions + [action])
+                if nodeLimit is not None and stats.expanded >= nodeLimit:
+                    return stats.finish(None)
+                stack.append((succ, cost + stepCost, iter(stats.expand(problem, succ))))
+                stats.noteFrontier(len(stack))
+                actions.append(action)
+                onPath.add(succ)
+                break
+            else:
+                stack.pop()
+                onPath.discard(state)
+                if actions: actions.pop()
+        if nextBound is None:
+            return stats.finish(None)
+        bound = nextBound
+
+class _MemoryBoundedNode:
+    "A node of the search tree kept by simplifiedMemoryBoundedAStar."
+    def __init__(self, state, parent, action, cost, f):
+        self.state, self.parent, self.action = state, parent, action
+        self.cost, self.f = cost, f
+        self.depth = 0
+        if parent is not None: self.depth = parent.depth + 1
+        self.successors = None # (state, action, stepCost) triples, once expanded
+        self.children = {}     # state -> child node, for the children in memory
+        self.forgotten = {}    # state -> backed up f, for children dropped from memory
+        self.version = 0       # bumped whenever the node's queue entries go stale
+
+def simplifiedMemoryBoundedAStar(problem, heuristic=nullHeuristic, memoryLimit=10000):
+    """
+    SMA* (Russell, 1992): A* that keeps at most memoryLimit nodes.  Nodes are
+    generated one successor at a time; when memory is full, the shallowest
+    leaf with the highest f is dropped and its f is remembered by its
+    parent, which goes back on the open list and regenerates that subtree
+    only once everything else looks worse.
+
+    Optimal if the optimal solution path fits in memory.  Returns None if
+    no solution can be reached within the memory limit.
+    """
+    import heapq
+    from itertools import count
+    stats = startStatistics(problem, 'simplifiedMemoryBoundedAStar')
+    infinity = float('inf')
+    tieBreaker = count()
+    best, worst = [], []   # lazy heaps of (key, ..., version, node) entries
+    openNodes = set()
+
+    def queue(node):
+        "Puts node on the open list, or refreshes its place there."
+        node.version += 1
+        openNodes.add(node)
+        heapq.heappush(best, (node.f, -node.depth, next(tieBreaker), node.version, node))
+        if not node.children:
+            heapq.heappush(worst, (-node.f, node.depth, next(tieBreaker), node.version, node))
+
+    def dequeue(node):
+        node.version += 1
+        openNodes.discard(node)
+
+    def onPath(node, state):
+        while node is not None:
+            if node.state == state: return True
+            node = node.parent
+        return False
+
+    def backup(node):
+        "Once all of node's successors have been generated, f is the least child f."
+        while node is not None and node.successors is not None:
+            if len(node.children) + len(node.forgotten) < len(node.successors):
+                return # some successor has never been generated
+            fs = [child.f for child in node.children.values()] + node.forgotten.values()
+            f = infinity
+            if fs: f = min(fs)
+            if f == node.f: return
+            node.f = f
+            if node in openNodes: queue(node)
+            node = node.parent
+
+    def forget(node):
+        "Drops a leaf from memory, leaving its f with its parent."
+        parent = node.parent
+        dequeue(node)
+        del parent.children[node.state]
+        parent.forgotten[node.state] = node.f
+        queue(parent)
+        backup(parent)
+
+    start = problem.getStartState()
+    root = _MemoryBoundedNode(start, None, None, 0, heuristic(start, problem))
+    queue(root)
+    used = 1
+    while openNodes:
+        entry = heapq.heappop(best)
+        node = entry[-1]
+        if entry[-2] != node.version or node not in openNodes:
+            continue # a stale entry
+        if node.f == infinity:
+            return stats.finish(None)
+        if problem.isGoalState(node.state):
+            actions = []
+            while node.parent is not None:
+                actions.append(node.action)
+                node = node.parent
+            actions.reverse()
+            return stats.finish(actions)
+
+        if node.successors is None:
+            successors = list(stats.expand(problem, node.state))
+            node.successors = [s for s in successors if not onPath(node.parent, s[0])]
+            stats.duplicates += len(successors) - len(node.successors)
+        pending = [s for s in node.successors if s[0] not in node.children]
+        if not pending:
+            # Every successor leads back up the path: a dead end
+            dequeue(node)
+            parent = node.parent
+            if parent is None:
+                return stats.finish(None)
+            del parent.children[node.state]
+            parent.successors = [s for s in parent.successors if s[0] != node.state]
+            used -= 1
+            backup(parent)
+            continue
+
+        # Successors never generated come first; forgotten ones are brought
+        # back only when the node is chosen again after all were generated
+        fresh = [s for s in pending if s[0] not in node.forgotten]
+        if fresh:
+            succ, action, stepCost = fresh[0]
+        else:
+            succ, action, stepCost = min(pending, key=lambda s: node.forgotten[s[0]])
+        cost = node.cost + stepCost
+        if succ in node.forgotten:
+            f = node.forgotten.pop(succ)
+        elif problem.isGoalState(succ) or node.depth + 1 < memoryLimit - 1:
+            f = max(node.f, cost + heuristic(succ, problem))
+        else:
+            f = infinity # too deep to ever reach a goal within memory
+        child = _MemoryBoundedNode(succ, node, action, cost, f)
+        node.children[succ] = child
+
+        # Once every successor has been generated, node.f rises to the least
+        # child f, so a node that keeps regenerating one forgotten child
+        # falls behind the rest of the open list
+        if len(pending) == 1:
+            dequeue(node)
+        else:
+            queue(node)
+        backup(node)
+
+        while used >= memoryLimit and worst:
+            entry = heapq.heappop(worst)
+            victim = entry[-1]
+            if entry[-2] != victim.version or victim not in openNodes or victim.children:
+                continue # a stale entry
+            if victim.parent is None:
+                continue
+            forget(victim)
+            used -= 1
+        queue(child)
+        used += 1
+        stats.noteFrontier(len(openNodes))
+
+        if len(best) + len(worst) > 4 * len(openNodes) + 64:
+            # Drop the stale entries, which would otherwise keep forgotten
+            # nodes alive
+            best[:] = [e for e in best if e[-2] == e[-1].version and e[-1] in openNodes]
+            worst[:] = [e for e in worst if e[-2] == e[-1].version and e[-1] in openNodes]
+            heapq.heapify(best)
+            heapq.heapify(worst)
+    return stats.finish(None)
 
 # Abbreviations
 bfs = breadthFirstSearch
 dfs = depthFirstSearch
 astar = aStarSearch
 ucs = uniformCostSearch
+wastar = weightedAStarSearch
+beam = beamSearch
+arastar = anytimeRepairingAStar
+idastar = iterativeDeepeningAStar
+smastar = simplifiedMemoryBoundedAStar
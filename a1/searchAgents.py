@@ -68,12 +68,20 @@ class SearchAgent(Agent):
     Options for fn include:
       depthFirstSearch or dfs
       breadthFirstSearch or bfs
+      weightedAStarSearch or wastar
+      beamSearch or beam
+      anytimeRepairingAStar or arastar
+      iterativeDeepeningAStar or idastar
+      simplifiedMemoryBoundedAStar or smastar
 
+    After the search, self.statistics holds the search.SearchStatistics of
+    the run.  With statistics=<file>, they are also appended to that file as
+    a line of JSON.
 
     Note: You should NOT change any code in SearchAgent
     """
 
-    def __init__(self, fn='depthFirstSearch', prob='PositionSearchProblem', heuristic='nullHeuristic'):
+    def __init__(self, fn='depthFirstSearch', prob='PositionSearchProblem', heuristic='nullHeuristic', statistics=None):
         # Warning: some advanced Python magic is employed below to find the right functions and problems
 
         # Get the search function from the name and heuristic
@@ -99,6 +107,7 @@ class SearchAgent(Agent):
             raise AttributeError, prob + ' is not a search problem type in SearchAgents.py.'
         self.searchType = globals()[prob]
         print('[SearchAgent] using problem type ' + prob)
+        self.statisticsFile = statistics
 
     def registerInitialState(self, state):
         """
@@ -116,6 +125,16 @@ class SearchAgent(Agent):
         totalCost = problem.getCostOfActions(self.actions)
         print('Path found with total cost of %d in %.1f seconds' % (totalCost, time.time() - starttime))
         if '_expanded' in dir(problem): print('Search nodes expanded: %d' % problem._expanded)
+        self.statistics = getattr(problem, 'searchStatistics', None)
+        if self.statistics is not None:
+            self.statistics.pathCost = totalCost
+            statisticsFile = getattr(self, 'statisticsFile', None) # subclasses may skip __init__
+            if statisticsFile is not None:
+                import json
+                print('[SearchAgent] %s' % self.statistics)
+                handle = open(statisticsFile, 'a')
+                handle.write(json.dumps(self.statistics.asDict(), sort_keys=True) + '\n')
+                handle.close()
 
     def getAction(self, state):
         """
@@ -153,6 +172,7 @@ class PositionSearchProblem(search.SearchProblem):
         goal: A position in the gameState
         """
         self.walls = gameState.getWalls()
+        self.neighbors = gameState.data.layout.neighbors
         self.startState = gameState.getPacmanPosition()
         if start != None: self.startState = start
         self.goal = goal
@@ -192,15 +212,9 @@ class PositionSearchProblem(search.SearchProblem):
          cost of expanding to that successor
         """
 
-        successors = []
-        for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            x,y = state
-            dx, dy = Actions.directionToVector(action)
-            nextx, nexty = int(x + dx), int(y + dy)
-            if not self.walls[nextx][nexty]:
-                nextState = (nextx, nexty)
-                cost = self.costFn(nextState)
-                successors.append( ( nextState, action, cost) )
+        # Moves are read from the layout's precomputed neighbor table
+        costFn = self.costFn
+        successors = [(nextState, action, costFn(nextState)) for action, nextState in self.neighbors[state]]
 
         # Bookkeeping for display purposes
         self._expanded += 1 # DO NOT CHANGE
@@ -210,6 +224,42 @@ class PositionSearchProblem(search.SearchProblem):
 
         return successors
 
+    def iterSuccessors(self, state):
+        """
+        Returns an iterator over the triples of getSuccessors, built one at a
+        time.  The expansion is counted here, when it is asked for.
+        """
+        self._expanded += 1 # DO NOT CHANGE
+        if state not in self._visited:
+            self._visited[state] = True
+            self._visitedlist.append(state)
+        return self._generateSuccessors(state)
+
+    def _generateSuccessors(self, state):
+        costFn = self.costFn
+        for action, nextState in self.neighbors[state]:
+            yield (nextState, action, costFn(nextState))
+
+    def getSuccessorsBatch(self, states):
+        """
+        Expands several states at once, returning one list of successor
+        triples per state in the order getSuccessors would produce them.
+        breadthFirstSearch expands each layer of its frontier through this.
+        """
+        costFn, neighbors = self.costFn, self.neighbors
+        visited, visitedlist = self._visited, self._visitedlist
+        batch = []
+        for state in states:
+            batch.append([(nextState, action, costFn(nextState)) for action, nextState in neighbors[state]])
+
+            # Bookkeeping for display purposes
+            self._expanded += 1 # DO NOT CHANGE
+            if state not in visited:
+                visited[state] = True
+                visitedlist.append(state)
+
+        return batch
+
     def getCostOfActions(self, actions):
         """
         Returns the cost of a particular sequence of actions. If those actions
@@ -271,9 +321,14 @@ class CornersProblem(search.SearchProblem):
     This search problem finds paths through all four corners of a layout.
 
     You must select a suitable state space and successor function
+
+    By default a state is ((x,y), remainingCorners).  With compact=True a state
+    is the single int cellIndex * 16 + cornerMask instead, where cellIndex
+    indexes layout.cells and bit i of cornerMask is set while self.corners[i]
+    is unvisited; encodeState and decodeState convert between the two.
     """
 
-    def __init__(self, startingGameState):
+    def __init__(self, startingGameState, compact=False):
         """
         Stores the walls, pacman's starting position and corners.
         """
@@ -287,7 +342,32 @@ class CornersProblem(search.SearchProblem):
         self._expanded = 0 # DO NOT CHANGE; Number of search nodes expanded
         # Please add any code here which you would like to use
         # in initializing the problem
+        self.layout = startingGameState.data.layout
+        self.neighbors = self.layout.neighbors
+        self.heuristicInfo = {} # A dictionary for the heuristic to store information
+        self.compact = compact
         self.start = (self.startingPosition, self.corners)
+        if compact:
+            # For each cell, the corner bits to keep when Pacman steps on it
+            keep = [15] * len(self.layout.cells)
+            for i, corner in enumerate(self.corners):
+                keep[self.layout.cellIndex[corner]] &= ~(1 << i)
+            self._compactMoves = [tuple([(action, j << 4, keep[j]) for action, j in moves])
+                                  for moves in self.layout.neighborIndices]
+            self.start = self.encodeState(self.start)
+
+    def encodeState(self, state):
+        "Returns the compact int for a ((x,y), remainingCorners) state."
+        position, remaining = state
+        mask = 0
+        for i, corner in enumerate(self.corners):
+            if corner in remaining: mask |= 1 << i
+        return (self.layout.cellIndex[position] << 4) | mask
+
+    def decodeState(self, state):
+        "Returns the ((x,y), remainingCorners) state for a compact int."
+        remaining = tuple([corner for i, corner in enumerate(self.corners) if state & (1 << i)])
+        return (self.layout.cells[state >> 4], remaining)
 
     def getStartState(self):
         """
@@ -300,6 +380,7 @@ class CornersProblem(search.SearchProblem):
         """
         Returns whether this search state is a goal state of the problem.
         """
+        if self.compact: return state & 15 == 0
         return len(state[1]) == 0
 
     def getSuccessors(self, state):
@@ -313,24 +394,65 @@ class CornersProblem(search.SearchProblem):
             is the incremental cost of expanding to that successor
         """
 
+        self._expanded += 1 # DO NOT CHANGE
+        if self.compact:
+            mask = state & 15
+            return [(cell | (mask & keep), action, 1) for action, cell, keep in self._compactMoves[state >> 4]]
+        position, corners = state
         successors = []
-        for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            # Add a successor state to the successor list if the action is legal
-            # Here's a code snippet for figuring out whether a new position hits a wall:
-            #   x,y = currentPosition
-            #   dx, dy = Actions.directionToVector(action)
-            #   nextx, nexty = int(x + dx), int(y + dy)
-            #   hitsWall = self.walls[nextx][nexty]
-            x,y = state[0]
-            dx, dy = Actions.directionToVector(action)
-            nextx, nexty = int(x + dx), int(y + dy)
-            if not self.walls[nextx][nexty]:
-                nextState = (nextx, nexty)
-                corners = tuple(x for x in state[1] if x != nextState)
-                successors.append(( (nextState,corners), action, 1 ))
+        for action, nextState in self.neighbors[position]:
+            if nextState in corners:
+                nextCorners = tuple([c for c in corners if c != nextState])
+            else:
+                nextCorners = corners
+            successors.append(( (nextState, nextCorners), action, 1 ))
+        return successors
 
+    def iterSuccessors(self, state):
+        """
+        Returns an iterator over the triples of getSuccessors, built one at a
+        time.  The expansion is counted here, when it is asked for.
+        """
         self._expanded += 1 # DO NOT CHANGE
-        return successors
+        return self._generateSuccessors(state)
+
+    def _generateSuccessors(self, state):
+        if self.compact:
+            mask = state & 15
+            for action, cell, keep in self._compactMoves[state >> 4]:
+                yield (cell | (mask & keep), action, 1)
+            return
+        position, corners = state
+        for action, nextState in self.neighbors[position]:
+            if nextState in corners:
+                yield ((nextState, tuple([c for c in corners if c != nextState])), action, 1)
+            else:
+                yield ((nextState, corners), action, 1)
+
+    def getSuccessorsBatch(self, states):
+        """
+        Expands several states at once, returning one list of successor
+        triples per state in the order getSuccessors would produce them.
+        """
+        self._expanded += len(states) # DO NOT CHANGE
+        batch = []
+        if self.compact:
+            moves = self._compactMoves
+            for state in states:
+                mask = state & 15
+                batch.append([(cell | (mask & keep), action, 1) for action, cell, keep in moves[state >> 4]])
+            return batch
+        neighbors = self.neighbors
+        for position, corners in states:
+            successors = []
+            for action, nextState in neighbors[position]:
+                if nextState in corners:
+                    nextCorners = tuple([c for c in corners if c != nextState])
+                else:
+                    nextCorners = corners
+                successors.append(( (nextState, nextCorners), action, 1 ))
+            batch.append(successors)
+        return batch
 
     def getCostOfActions(self, actions):
         """
@@ -362,15 +484,40 @@ def cornersHeuristic(state, problem):
     #corners = problem.corners # These are the corner coordinates
     #walls = problem.walls # These are the walls of the maze, as a Grid (game.py)
 
-    curPos = state[0]
-    corners = list(state[1])
-    dist = lambda p, q: abs(p[0]-q[0])+abs(p[1]-q[1])
-
-    d = 0
-    if len(corners) > 0:
-        d = max([dist(curPos,p) for p in corners])
-
-    return d # Default to trivial solution
+    # The corners are fixed per layout, so precompute the maze distance from
+    # each corner to every cell, and tours[i][mask]: the length of the
+    # shortest walk that starts at corner i and visits every corner in mask.
+    # The heuristic is then exact: the best first corner plus its tour.
+    info = problem.heuristicInfo
+    if 'tours' not in info:
+        layout, corners = problem.layout, problem.corners
+        fields = [layout.distanceField(corner) for corner in corners]
+        between = [[field[layout.cellIndex[corner]] for corner in corners] for field in fields]
+        tours = [[0] * 16 for corner in corners]
+        for mask in range(1, 16):
+            for i in range(4):
+                rest = mask & ~(1 << i)
+                if mask & (1 << i) and rest:
+                    tours[i][mask] = min([between[i][j] + tours[j][rest] for j in range(4) if rest & (1 << j)])
+        info['fields'], info['tours'] = fields, tours
+        info['bits'] = dict([(corner, 1 << i) for i, corner in enumerate(corners)])
+
+    if problem.compact:
+        cell, mask = state >> 4, state & 15
+    else:
+        position, remaining = state
+        bits, mask = info['bits'], 0
+        for corner in remaining:
+            mask |= bits[corner]
+        cell = problem.layout.cellIndex[position]
+    if not mask: return 0
+    fields, tours = info['fields'], info['tours']
+    return min([fields[i][cell] + tours[i][mask] for i in range(4) if mask & (1 << i)])
+
+class CompactCornersProblem(CornersProblem):
+    "A CornersProblem using the compact int state encoding."
+    def __init__(self, startingGameState):
+        CornersProblem.__init__(self, startingGameState, compact=True)
 
 class AStarCornersAgent(SearchAgent):
     "A SearchAgent for FoodSearchProblem using A* and your foodHeuristic"
@@ -390,6 +537,7 @@ class FoodSearchProblem:
     def __init__(self, startingGameState):
         self.start = (startingGameState.getPacmanPosition(), startingGameState.getFood())
         self.walls = startingGameState.getWalls()
+        self.neighbors = startingGameState.data.layout.neighbors
         self.startingGameState = startingGameState
         self._expanded = 0 # DO NOT CHANGE
         self.heuristicInfo = {} # A dictionary for the heuristic to store information
@@ -402,18 +550,60 @@ class FoodSearchProblem:
 
     def getSuccessors(self, state):
         "Returns successor states, the actions they require, and a cost of 1."
-        successors = []
+        # The food grid is only copied for moves that eat a dot
         self._expanded += 1 # DO NOT CHANGE
-        for direction in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            x,y = state[0]
-            dx, dy = Actions.directionToVector(direction)
-            nextx, nexty = int(x + dx), int(y + dy)
-            if not self.walls[nextx][nexty]:
-                nextFood = state[1].copy()
+        position, foodGrid = state
+        successors = []
+        for direction, nextPosition in self.neighbors[position]:
+            nextx, nexty = nextPosition
+            if foodGrid[nextx][nexty]:
+                nextFood = foodGrid.copy()
                 nextFood[nextx][nexty] = False
-                successors.append( ( ((nextx, nexty), nextFood), direction, 1) )
+            else:
+                nextFood = foodGrid
+            successors.append( ( (nextPosition, nextFood), direction, 1) )
         return successors
 
+    def iterSuccessors(self, state):
+        """
+        Returns an iterator over the triples of getSuccessors, built one at a
+        time.  The expansion is counted here, when it is asked for.
+        """
+        self._expanded += 1 # DO NOT CHANGE
+        return self._generateSuccessors(state)
+
+    def _generateSuccessors(self, state):
+        position, foodGrid = state
+        for direction, nextPosition in self.neighbors[position]:
+            nextx, nexty = nextPosition
+            if foodGrid[nextx][nexty]:
+                nextFood = foodGrid.copy()
+                nextFood[nextx][nexty] = False
+                yield ((nextPosition, nextFood), direction, 1)
+            else:
+                yield ((nextPosition, foodGrid), direction, 1)
+
+    def getSuccessorsBatch(self, states):
+        """
+        Expands several states at once, returning one list of successor
+        triples per state in the order getSuccessors would produce them.
+        """
+        self._expanded += len(states) # DO NOT CHANGE
+        neighbors = self.neighbors
+        batch = []
+        for position, foodGrid in states:
+            successors = []
+            for direction, nextPosition in neighbors[position]:
+                nextx, nexty = nextPosition
+                if foodGrid[nextx][nexty]:
+                    nextFood = foodGrid.copy()
+                    nextFood[nextx][nexty] = False
+                else:
+                    nextFood = foodGrid
+                successors.append( ( (nextPosition, nextFood), direction, 1) )
+            batch.append(successors)
+        return batch
+
     def getCostOfActions(self, actions):
         """Returns the cost of a particular sequence of actions.  If those actions
         include an illegal move, return 999999"""
@@ -460,15 +650,100 @@ def foodHeuristic(state, problem):
     problem.heuristicInfo['wallCount']
 
     """
-    from itertools import combinations
     position, foodGrid = state
-    foods = foodGrid.asList()
-    dist = lambda p, q: abs(p[0]-q[0])+abs(p[1]-q[1])
-    d = 0
-    pair_dists = [dist(x[0], x[1]) for x in combinations([position] + foods, 2)]
-    if len(pair_dists) > 0:
-        d = max(pair_dists)
-    return d
+    info = problem.heuristicInfo
+    if 'foods' not in info:
+        layout = problem.startingGameState.data.layout
+        foods = problem.start[1].asList()
+        fields = [layout.distanceField(food) for food in foods]
+        info['layout'] = layout
+        info['foods'] = foods
+        info['foodCells'] = [layout.cellIndex[food] for food in foods]
+        info['pairDist'] = [[field[layout.cellIndex[food]] for food in foods] for field in fields]
+        info['mst'] = {}
+
+    # The remaining food as a bitmask over the starting food
+    foods, mask, remaining = info['foods'], 0, []
+    for i in range(len(foods)):
+        x, y = foods[i]
+        if foodGrid[x][y]:
+            mask |= 1 << i
+            remaining.append(i)
+    if not remaining: return 0
+
+    field = info['layout'].distanceField(position)
+    foodCells = info['foodCells']
+    toFood = [field[foodCells[i]] for i in remaining]
+    weight = _foodTree(info, mask, remaining, position)[0]
+    return max(min(toFood) + weight, max(toFood))
+
+def _foodTree(info, mask, remaining, position):
+    """
+    Returns the minimum spanning tree over the remaining food, as a pair
+    (weight, edges) with edges a list of (distance, i, j) food index triples,
+    memoized in info['mst'] by food bitmask.  When the parent state's tree
+    is known (Pacman just ate the dot he stands on), the tree is repaired
+    instead of rebuilt: only the components left by removing that dot need
+    to be reconnected.
+    """
+    trees = info['mst']
+    if mask in trees: return trees[mask]
+    pairDist = info['pairDist']
+    eaten = None
+    if position in info['foods']:
+        eaten = info['foods'].index(position)
+        if mask & (1 << eaten) or (mask | (1 << eaten)) not in trees:
+            eaten = None
+
+    if eaten is None:
+        # Prim's algorithm over the complete maze-distance graph
+        first, rest = remaining[0], remaining[1:]
+        best = dict([(i, (pairDist[first][i], first)) for i in rest])
+        weight, edges = 0, []
+        while best:
+            i = min(best, key=lambda k: best[k][0])
+            d, j = best.pop(i)
+            weight += d
+            edges.append((d, j, i))
+            for k in best:
+                if pairDist[i][k] < best[k][0]:
+                    best[k] = (pairDist[i][k], i)
+    else:
+        # Drop the eaten dot from its parent's tree, then reconnect the
+        # pieces with the cheapest edges between them (Kruskal)
+        parentEdges = trees[mask | (1 << eaten)][1]
+        component = dict([(i, i) for i in remaining])
+        def find(i):
+            while component[i] != i:
+                component[i] = component[component[i]]
+                i = component[i]
+            return i
+        weight, edges = 0, []
+        for d, i, j in parentEdges:
+            if eaten != i and eaten != j:
+                component[find(i)] = find(j)
+                weight += d
+                edges.append((d, i, j))
+        pieces = len(remaining) - 1 - len(edges)
+        if pieces > 0:
+            cross = []
+            for a in range(len(remaining)):
+                i = remaining[a]
+                for j in remaining[a + 1:]:
+                    if find(i) != find(j):
+                        cross.append((pairDist[i][j], i, j))
+            cross.sort()
+            for d, i, j in cross:
+                rootI, rootJ = find(i), find(j)
+                if rootI != rootJ:
+                    component[rootI] = rootJ
+                    weight += d
+                    edges.append((d, i, j))
+                    pieces -= 1
+                    if pieces == 0: break
+
+    trees[mask] = (weight, edges)
+    return trees[mask]
 
 class ClosestDotSearchAgent(SearchAgent):
     "Search for all food using a sequence of searches"
@@ -477,6 +752,8 @@ class ClosestDotSearchAgent(SearchAgent):
         currentState = state
         while(currentState.getFood().count() > 0):
             nextPathSegment = self.findPathToClosestDot(currentState) # The missing piece
+            if nextPathSegment is None:
+                raise Exception, 'No food can be reached from %s' % str(currentState.getPacmanPosition())
             self.actions += nextPathSegment
             for action in nextPathSegment:
                 legal = currentState.getLegalActions()
@@ -492,12 +769,12 @@ class ClosestDotSearchAgent(SearchAgent):
         Returns a path (a list of actions) to the closest dot, starting from
         gameState.
         """
-        # Here are some useful elements of the startState
+        # A breadth-first search stopped at the first dot, as search.bfs on an
+        # AnyFoodSearchProblem would find, but on the layout's Wavefront,
+        # whose buffers are reused from one leg to the next
         startPosition = gameState.getPacmanPosition()
         food = gameState.getFood()
-        walls = gameState.getWalls()
-        problem = AnyFoodSearchProblem(gameState)
-        return search.bfs(problem)
+        return gameState.data.layout.pathToNearestTarget(startPosition, food)
 
 
 class AnyFoodSearchProblem(PositionSearchProblem):
@@ -522,6 +799,7 @@ class AnyFoodSearchProblem(PositionSearchProblem):
 
         # Store info for the PositionSearchProblem (no need to change this)
         self.walls = gameState.getWalls()
+        self.neighbors = gameState.data.layout.neighbors
         self.startState = gameState.getPacmanPosition()
         self.costFn = lambda x: 1
         self._visited, self._visitedlist, self._expanded = {}, [], 0 # DO NOT CHANGE
@@ -549,5 +827,4 @@ def mazeDistance(point1, point2, gameState):
     walls = gameState.getWalls()
     assert not walls[x1][y1], 'point1 is a wall: ' + str(point1)
     assert not walls[x2][y2], 'point2 is a wall: ' + str(point2)
-    prob = PositionSearchProblem(gameState, start=point1, goal=point2, warn=False, visualize=False)
-    return len(search.bfs(prob))
+    return gameState.data.layout.getMazeDistance(point1, point2)
@@ -0,0 +1,371 @@
+# tests.py
+# --------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Checks of search.py and searchAgents.py beyond what the autograder's
+test_cases cover: the bounded-suboptimal, anytime and memory-bounded
+searches, search statistics, successor generation and the heuristics.
+
+> python tests.py
+"""
+
+import random
+import unittest
+
+import layout
+import pacman
+import search
+import searchAgents
+import eightpuzzle
+
+MAZES = ['tinyMaze', 'mediumMaze']
+
+# Seeds of createRandomSlidingPuzzle(3, 40, seed) puzzles
+PUZZLE_SEEDS = range(8)
+
+WEIGHTS = [1.5, 2.0, 5.0]
+
+## HELPER FUNCTIONS
+def optimalCost(puzzle):
+    problem = eightpuzzle.EightPuzzleSearchProblem(puzzle)
+    return len(search.aStarSearch(problem, eightpuzzle.manhattanHeuristic))
+
+def gameState(name):
+    state = pacman.GameState()
+    state.initialize(layout.getLayout(name), 0)
+    return state
+
+def mazeProblem(name):
+    return searchAgents.PositionSearchProblem(gameState(name), warn=False, visualize=False)
+
+def foodProblem(name, start=None):
+    problem = searchAgents.FoodSearchProblem(gameState(name))
+    if start is not None: problem.start = start
+    return problem
+
+def pathStates(problem, path):
+    "(state, cost left) for each state along path from the start, goal last"
+    state, left = problem.getStartState(), problem.getCostOfActions(path)
+    states = [(state, left)]
+    for action in path:
+        state, stepCost = [(succ, cost) for succ, a, cost in problem.getSuccessors(state) if a == action][0]
+        left -= stepCost
+        states.append((state, left))
+    return states
+
+def checkHeuristic(test, name, problem, heuristic, path, states):
+    """
+    Checks heuristic against the optimal path from the start of problem: on
+    the path it must not exceed the cost left, and be 0 at the goal, and on
+    each successor of states it must drop by no more than the step cost.
+    """
+    for state, left in pathStates(problem, path):
+        test.assertTrue(heuristic(state, problem) <= left,
+                        "The heuristic overestimates the cost left (%d) on %s" % (left, name))
+    test.assertEqual(heuristic(state, problem), 0, "The heuristic is not 0 at the goal on %s" % name)
+    for state in states:
+        h = heuristic(state, problem)
+        for succ, action, stepCost in problem.getSuccessors(state):
+            test.assertTrue(h <= stepCost + heuristic(succ, problem),
+                            "The heuristic is inconsistent going %s on %s" % (action, name))
+
+def cornersProblem(name, start=None, compact=False):
+    problem = searchAgents.CornersProblem(gameState(name), compact)
+    if start is not None: problem.start = start
+    return problem
+
+def bfsDistances(walls, source):
+    "Maze distances from source by a plain breadth-first search over walls"
+    distances, frontier = {source: 0}, [source]
+    for x, y in frontier:
+        for nextPos in [(x, y + 1), (x, y - 1), (x + 1, y), (x - 1, y)]:
+            if not walls[nextPos[0]][nextPos[1]] and nextPos not in distances:
+                distances[nextPos] = distances[(x, y)] + 1
+                frontier.append(nextPos)
+    return distances
+
+def successorProblems():
+    "(name, problem factory) for a problem of each kind in searchAgents"
+    return [('PositionSearchProblem', lambda: mazeProblem('mediumMaze')),
+            ('CornersProblem', lambda: searchAgents.CornersProblem(gameState('mediumCorners'))),
+            ('CompactCornersProblem', lambda: searchAgents.CompactCornersProblem(gameState('mediumCorners'))),
+            ('FoodSearchProblem', lambda: searchAgents.FoodSearchProblem(gameState('trickySearch')))]
+
+def reachableStates(problem, limit):
+    "Up to limit states in the order breadth first search reaches them"
+    start = problem.getStartState()
+    states, seen = [start], set([start])
+    for state in states:
+        if len(states) >= limit: break
+        for succ, action, stepCost in problem.getSuccessors(state):
+            if succ not in seen:
+                seen.add(succ)
+                states.append(succ)
+    return states[:limit]
+
+def searchCases():
+    """
+    (name, problem factory, heuristic, optimal cost) for each maze and each
+    puzzle of EIGHT_PUZZLE_DATA
+    """
+    cases = []
+    for name in MAZES:
+        makeProblem = lambda name=name: mazeProblem(name)
+        problem = makeProblem()
+        optimal = problem.getCostOfActions(search.uniformCostSearch(problem))
+        cases.append((name, makeProblem, searchAgents.manhattanHeuristic, optimal))
+    for number in range(len(eightpuzzle.EIGHT_PUZZLE_DATA)):
+        puzzle = eightpuzzle.loadEightPuzzle(number)
+        makeProblem = lambda puzzle=puzzle: eightpuzzle.EightPuzzleSearchProblem(puzzle)
+        cases.append(('puzzle %d' % number, makeProblem, eightpuzzle.manhattanHeuristic, optimalCost(puzzle)))
+    return cases
+
+# SPECIFY WHAT TO TEST
+TEST_SUBOPTIMAL     = True
+TEST_MEMORY_BOUNDED = True
+TEST_STATISTICS     = True
+TEST_SUCCESSORS     = True
+TEST_HEURISTICS     = True
+TEST_LAYOUT         = True
+
+class TestSearch(unittest.TestCase):
+    @unittest.skipUnless(TEST_SUBOPTIMAL, "Not Testing Suboptimal Search.")
+    def test_weighted_astar_bound(self):
+        for name, makeProblem, heuristic, optimal in searchCases():
+            for weight in WEIGHTS:
+                problem = makeProblem()
+                path = search.weightedAStarSearch(problem, heuristic, weight)
+                self.assertTrue(path is not None, "Weighted A* found no path for %s" % name)
+                self.assertTrue(problem.getCostOfActions(path) <= weight * optimal,
+                                "Weighted A* with weight %s went over its bound for %s" % (weight, name))
+
+    @unittest.skipUnless(TEST_SUBOPTIMAL, "Not Testing Suboptimal Search.")
+    def test_beam_search(self):
+        for name, makeProblem, heuristic, optimal in searchCases():
+            problem = makeProblem()
+            path = search.beamSearch(problem, heuristic, width=100000)
+            self.assertEqual(problem.getCostOfActions(path), optimal,
+                             "Beam search wider than the state space is not optimal for %s" % name)
+
+    @unittest.skipUnless(TEST_SUBOPTIMAL, "Not Testing Suboptimal Search.")
+    def test_arastar_optimal(self):
+        for name, makeProblem, heuristic, optimal in searchCases():
+            problem = makeProblem()
+            bounds = []
+            for bound, path in search.anytimeRepairingAStarSolutions(problem, heuristic, timeLimit=None):
+                self.assertTrue(problem.getCostOfActions(path) <= bound * optimal,
+                                "ARA* went over its reported bound for %s" % name)
+                bounds.append(bound)
+            self.assertEqual(problem.getCostOfActions(path), optimal, "ARA*'s last path is not optimal for %s" % name)
+            self.assertEqual(bounds, sorted(bounds, reverse=True), "ARA*'s bounds rose for %s" % name)
+
+    @unittest.skipUnless(TEST_SUBOPTIMAL, "Not Testing Suboptimal Search.")
+    def test_arastar_statistics(self):
+        search.STATISTICS_LOG = []
+        try:
+            problem = mazeProblem('mediumMaze')
+            path = search.anytimeRepairingAStar(problem, searchAgents.manhattanHeuristic, timeLimit=None)
+            self.assertEqual(len(search.STATISTICS_LOG), 1, "ARA* recorded its statistics more than once")
+            self.assertEqual(search.STATISTICS_LOG[0]['pathLength'], len(path),
+                             "ARA*'s statistics are not those of its final path")
+        finally:
+            search.STATISTICS_LOG = None
+
+    @unittest.skipUnless(TEST_MEMORY_BOUNDED, "Not Testing Memory Bounded Search.")
+    def test_smastar_puzzles(self):
+        for seed in PUZZLE_SEEDS:
+            puzzle = eightpuzzle.createRandomSlidingPuzzle(3, 40, seed)
+            optimal = optimalCost(puzzle)
+            for memoryLimit in (100, 2000):
+                problem = eightpuzzle.EightPuzzleSearchProblem(puzzle)
+                path = search.simplifiedMemoryBoundedAStar(problem, eightpuzzle.manhattanHeuristic, memoryLimit)
+                self.assertTrue(path is not None, "SMA* found no path for seed %d" % seed)
+                self.assertEqual(len(path), optimal,
+                                 "SMA* with memoryLimit %d is not optimal for seed %d" % (memoryLimit, seed))
+
+    @unittest.skipUnless(TEST_MEMORY_BOUNDED, "Not Testing Memory Bounded Search.")
+    def test_smastar_too_little_memory(self):
+        # A path of n moves holds n + 1 nodes
+        puzzle = eightpuzzle.createRandomSlidingPuzzle(3, 12, 0)
+        optimal = optimalCost(puzzle)
+        problem = eightpuzzle.EightPuzzleSearchProblem(puzzle)
+        path = search.simplifiedMemoryBoundedAStar(problem, eightpuzzle.manhattanHeuristic, optimal)
+        self.assertEqual(path, None, "SMA* found a path longer than its memory")
+        problem = eightpuzzle.EightPuzzleSearchProblem(puzzle)
+        path = search.simplifiedMemoryBoundedAStar(problem, eightpuzzle.manhattanHeuristic, optimal + 1)
+        self.assertEqual(len(path), optimal, "SMA* missed a path that just fits in memory")
+
+    @unittest.skipUnless(TEST_STATISTICS, "Not Testing Search Statistics.")
+    def test_branching_factor_deep_maze(self):
+        # bigMaze's path is 210 moves deep, far past where b ** 210 overflows
+        # for b near the number of nodes generated
+        search.STATISTICS_LOG = []
+        try:
+            problem = mazeProblem('bigMaze')
+            path = search.breadthFirstSearch(problem)
+            statistics = search.STATISTICS_LOG[0]
+            factor = statistics['branchingFactor']
+            self.assertEqual(statistics['pathLength'], len(path), "The statistics are not those of BFS's path")
+            self.assertTrue(factor is not None and 1.0 < factor < 2.0,
+                            "Branching factor %s is out of range for bigMaze" % factor)
+            nodes = sum([factor ** d for d in range(1, len(path) + 1)])
+            self.assertAlmostEqual(nodes / statistics['generated'], 1.0, 6,
+                                   "A tree of branching factor %s does not generate %d nodes"
+                                   % (factor, statistics['generated']))
+        finally:
+            search.STATISTICS_LOG = None
+
+    @unittest.skipUnless(TEST_SUCCESSORS, "Not Testing Successor Generation.")
+    def test_successors_batch(self):
+        for name, makeProblem in successorProblems():
+            states = reachableStates(makeProblem(), 500)
+            problem = makeProblem()
+            expected = [problem.getSuccessors(state) for state in states]
+            batchProblem = makeProblem()
+            self.assertEqual(batchProblem.getSuccessorsBatch(states), expected,
+                             "getSuccessorsBatch differs from getSuccessors for %s" % name)
+            self.assertEqual(batchProblem._expanded, problem._expanded,
+                             "getSuccessorsBatch counted its expansions wrongly for %s" % name)
+
+    @unittest.skipUnless(TEST_SUCCESSORS, "Not Testing Successor Generation.")
+    def test_lazy_successors(self):
+        problems = successorProblems() + [('EightPuzzleSearchProblem',
+            lambda: eightpuzzle.EightPuzzleSearchProblem(eightpuzzle.loadEightPuzzle(0)))]
+        for name, makeProblem in problems:
+            states = reachableStates(makeProblem(), 500)
+            eager, lazy = makeProblem(), makeProblem()
+            for state in states:
+                successors = lazy.iterSuccessors(state)
+                self.assertEqual(lazy._expanded, eager._expanded + 1,
+                                 "iterSuccessors did not count its expansion when called for %s" % name)
+                self.assertEqual(list(successors), eager.getSuccessors(state),
+                                 "iterSuccessors differs from getSuccessors for %s" % name)
+
+    @unittest.skipUnless(TEST_SUCCESSORS, "Not Testing Successor Generation.")
+    def test_bfs_goal_on_generation(self):
+        for name in ['mediumMaze', 'bigMaze']:
+            path = search.breadthFirstSearch(mazeProblem(name))
+            eager = mazeProblem(name)
+            eager.iterSuccessors = eager.getSuccessorsBatch = None # goal test on expansion
+            self.assertEqual(len(path), len(search.breadthFirstSearch(eager)),
+                             "BFS with the goal test on generation changed the path length on %s" % name)
+            self.assertEqual(len(path), len(search.uniformCostSearch(mazeProblem(name))),
+                             "BFS found a path longer than the shortest on %s" % name)
+
+    @unittest.skipUnless(TEST_SUCCESSORS, "Not Testing Successor Generation.")
+    def test_bfs_layers(self):
+        for name, makeProblem in successorProblems():
+            problem = makeProblem()
+            path = search.breadthFirstSearch(problem)
+            nodeProblem = makeProblem()
+            nodeProblem.getSuccessorsBatch = None # expand node by node
+            self.assertEqual(path, search.breadthFirstSearch(nodeProblem),
+                             "BFS by layers found another path for %s" % name)
+
+    @unittest.skipUnless(TEST_HEURISTICS, "Not Testing Heuristics.")
+    def test_food_heuristic(self):
+        for name in ['tinySearch', 'trickySearch']:
+            problem = foodProblem(name)
+            path = search.uniformCostSearch(problem)
+            checkHeuristic(self, name, problem, searchAgents.foodHeuristic, path, reachableStates(problem, 500))
+            self.assertEqual(len(search.aStarSearch(foodProblem(name), searchAgents.foodHeuristic)), len(path),
+                             "A* with foodHeuristic is not optimal on %s" % name)
+            # Away from the optimal path, against the cost found by UCS from there
+            for state in reachableStates(problem, 2000)[::400]:
+                left = len(search.uniformCostSearch(foodProblem(name, state)))
+                self.assertTrue(searchAgents.foodHeuristic(state, problem) <= left,
+                                "foodHeuristic overestimates the cost left (%d) on %s" % (left, name))
+
+    @unittest.skipUnless(TEST_HEURISTICS, "Not Testing Heuristics.")
+    def test_corners_heuristic(self):
+        # The corner tours run over maze distances, so the heuristic is the
+        # exact cost left from every state, walls or not
+        for name in ['tinyCorners', 'mediumCorners']:
+            problem = cornersProblem(name)
+            path = search.breadthFirstSearch(problem)
+            states = reachableStates(problem, 1000)
+            checkHeuristic(self, name, problem, searchAgents.cornersHeuristic, path, states)
+            compact = cornersProblem(name, compact=True)
+            for state in states[::25]:
+                left = len(search.breadthFirstSearch(cornersProblem(name, state)))
+                h = searchAgents.cornersHeuristic(state, problem)
+                self.assertTrue(h <= left, "cornersHeuristic overestimates the cost left (%d) on %s" % (left, name))
+                self.assertEqual(h, left, "cornersHeuristic is not exact at %s on %s" % (str(state), name))
+                self.assertEqual(searchAgents.cornersHeuristic(compact.encodeState(state), compact), h,
+                                 "cornersHeuristic differs on the compact state on %s" % name)
+
+    @unittest.skipUnless(TEST_HEURISTICS, "Not Testing Heuristics.")
+    def test_food_tree_repair(self):
+        problem = foodProblem('trickySearch')
+        searchAgents.foodHeuristic(problem.getStartState(), problem)
+        info = problem.heuristicInfo
+        foods = info['foods']
+        def check(mask, eaten):
+            remaining = [i for i in range(len(foods)) if mask & (1 << i)]
+            weight, edges = searchAgents._foodTree(info, mask, remaining, foods[eaten])
+            fresh = dict(info, mst={})
+            self.assertEqual(weight, searchAgents._foodTree(fresh, mask, remaining, None)[0],
+                             "The repaired tree without dot %d is not minimal" % eaten)
+            self.assertEqual(len(edges), len(remaining) - 1, "The repaired tree does not span the food")
+        full = (1 << len(foods)) - 1
+        for eaten in range(len(foods)):
+            check(full & ~(1 << eaten), eaten)
+        # Eating the dots in turn repairs each tree from the last one
+        mask = full
+        for eaten in random.Random(0).sample(range(len(foods)), len(foods) - 1):
+            mask &= ~(1 << eaten)
+            check(mask, eaten)
+
+    @unittest.skipUnless(TEST_SUCCESSORS, "Not Testing Successor Generation.")
+    def test_compact_corners(self):
+        for name in ['tinyCorners', 'mediumCorners']:
+            problem, compact = cornersProblem(name), cornersProblem(name, compact=True)
+            self.assertEqual(compact.decodeState(compact.getStartState()), problem.getStartState(),
+                             "The compact start state does not decode to the start on %s" % name)
+            for code in range(len(compact.layout.cells) * 16):
+                self.assertEqual(compact.encodeState(compact.decodeState(code)), code,
+                                 "State %d does not survive decoding on %s" % (code, name))
+            for state in reachableStates(problem, 2000):
+                code = compact.encodeState(state)
+                self.assertEqual(compact.decodeState(code), state, "%s does not survive encoding on %s" % (str(state), name))
+                self.assertEqual([(compact.decodeState(succ), action, cost) for succ, action, cost in compact.getSuccessors(code)],
+                                 problem.getSuccessors(state),
+                                 "The compact successors of %s differ on %s" % (str(state), name))
+                self.assertEqual(compact.isGoalState(code), problem.isGoalState(state),
+                                 "The compact goal test differs at %s on %s" % (str(state), name))
+
+    @unittest.skipUnless(TEST_LAYOUT, "Not Testing Layout Searches.")
+    def test_distance_field(self):
+        for name in ['tinyMaze', 'bigMaze', 'openMaze', 'trickySearch']:
+            lay = layout.getLayout(name)
+            for source in lay.cells[::max(1, len(lay.cells) // 10)]:
+                distances = bfsDistances(lay.walls, source)
+                field = lay.distanceField(source)
+                for i, cell in enumerate(lay.cells):
+                    self.assertEqual(field[i], distances.get(cell, -1),
+                                     "distanceField from %s to %s is wrong on %s" % (str(source), str(cell), name))
+
+    @unittest.skipUnless(TEST_LAYOUT, "Not Testing Layout Searches.")
+    def test_wavefront_sources(self):
+        lay = layout.getLayout('mediumMaze')
+        wavefront = lay.getWavefront()
+        near, far = lay.cells[40], lay.cells[5]
+        target = lay.cells[60]
+        distances = [wavefront.search(near, [target])[0][0], wavefront.search(far, [target])[0][0]]
+        for sources in ((near, far), [near, far], (far, near)):
+            self.assertEqual(wavefront.search(sources, [target]), [(min(distances), target)],
+                             "Wavefront did not search from every source in %s" % str(sources))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+'''
+Benchmark of the propagators on random KenKen boards.
+
+Boards are generated from a seed in the format of the BOARDS in tests.py: a
+random Latin square is cut into cages of up to four cells, and each cage is
+given an operation its values satisfy. Each board is solved with bt_search
+and ord_mrv, and the decisions, prunings and seconds of each run are printed.
+
+The models are
+
+    cages   kenken_csp_model: AllDifferent rows and columns, arithmetic cages
+    tables  kenken_csp_model with table_cages=True
+    binary  binary_ne_grid plus a table for each cage, built here by brute
+            force; it only needs Constraint, CSP and BT, so the same file can
+            time older versions of the propagators
+
+The 9x9 timings of prop_GAC for the commit that moved it to a queue of
+arcs were taken with
+
+    python bench_kenken.py -n 9 -b 10 -c 5 -m binary -p prop_GAC
+
+running the trees before (3c389fc) and after (8e80d18) that commit one
+after the other on one machine. The decisions were the same in both:
+
+    prop_GAC on a list, pop(0) and scans     62.0 s total, 41.1 s on board 1
+    prop_GAC on a deque of arcs              44.7 s total, 31.6 s on board 1
+
+That is about 1.4 times faster, short of the several times that was
+hoped for. The queue was never most of the cost: nearly all the time
+goes to the support checks of the revisions (has_support, tuple_is_valid
+and in_cur_domain), which scheduling arcs only makes fewer of.
+'''
+
+import argparse
+import random
+import sys
+import time
+from functools import reduce
+from itertools import permutations, product
+
+from cspbase import Constraint, BT
+from heuristics import ord_mrv
+import kenken_csp
+import propagators
+
+OPERATIONS = {0: lambda x, y: x + y, 1: lambda x, y: x - y,
+              2: lambda x, y: x // y, 3: lambda x, y: x * y}
+
+def random_board(n, seed, max_cage=4):
+    '''
+    A KenKen board of size n (at most 9, so cells fit the two digit format)
+    from a random Latin square. Cages grow from random cells into free
+    neighbours; pairs may use any operation their values allow, larger
+    cages + or *.
+    '''
+    rng = random.Random(seed)
+    rows, cols, symbols = list(range(n)), list(range(n)), list(range(1, n+1))
+    rng.shuffle(rows)
+    rng.shuffle(cols)
+    rng.shuffle(symbols)
+    square = [[symbols[(rows[i] + cols[j]) % n] for j in range(n)] for i in range(n)]
+
+    free = set((i, j) for i in range(n) for j in range(n))
+    board = [[n]]
+    for start in sorted(free):
+        if start not in free:
+            continue
+        free.discard(start)
+        cage = [start]
+        size = rng.randint(1, max_cage)
+        while len(cage) < size:
+            options = [(i+di, j+dj) for i, j in cage for di, dj in ((0,1),(1,0),(0,-1),(-1,0))
+                       if (i+di, j+dj) in free]
+            if not options:
+                break
+            cell = rng.choice(sorted(options))
+            free.discard(cell)
+            cage.append(cell)
+        cells = [10*(i+1) + j+1 for i, j in cage]
+        vals = [square[i][j] for i, j in cage]
+        if len(cage) == 1:
+            board.append(cells + vals)
+            continue
+        ops = [0, 3]
+        if len(cage) == 2:
+            ops.append(1)
+            if max(vals) % min(vals) == 0:
+                ops.append(2)
+        op = rng.choice(ops)
+        if op in (1, 2):
+            vals = sorted(vals, reverse=True)
+        board.append(cells + [reduce(OPERATIONS[op], vals), op])
+    return board, square
+
+def binary_table_model(board):
+    '''binary_ne_grid plus a table constraint for each cage'''
+    n = board[0][0]
+    csp, variables = kenken_csp.binary_ne_grid(board)
+    for raw in board[1:]:
+        if len(raw) == 2:
+            i, j = kenken_csp.getij(raw[0])
+            cons = Constraint(str(raw), [variables[i][j]])
+            cons.add_satisfying_tuples([[raw[1]]])
+        else:
+            vars = [variables[i][j] for i, j in map(kenken_csp.getij, raw[:-2])]
+            cons = Constraint(str(raw), vars)
+            tuples = set()
+            for t in product(range(1, n+1), repeat=len(vars)):
+                if t not in tuples and reduce(OPERATIONS[raw[-1]], t) == raw[-2]:
+                    tuples.update(permutations(t))
+            cons.add_satisfying_tuples(sorted(tuples))
+        csp.add_constraint(cons)
+    return csp, variables
+
+MODELS = {'cages': lambda board: kenken_csp.kenken_csp_model(board),
+          'tables': lambda board: kenken_csp.kenken_csp_model(board, True),
+          'binary': binary_table_model}
+
+def run(board, model, prop):
+    '''Solve board; returns (decisions, prunings, seconds, solved)'''
+    start = time.time()
+    csp, variables = MODELS[model](board)
+    solver = BT(csp)
+    solver.quiet()
+    solver.bt_search(prop, ord_mrv)
+    seconds = time.time() - start
+    solved = all(var.get_assigned_value() is not None for row in variables for var in row)
+    return solver.nDecisions, solver.nPrunings, seconds, solved
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('-n', '--size', type=int, default=9, help='board size, at most 9')
+    parser.add_argument('-b', '--boards', type=int, default=5, help='number of boards (seeds 0, 1, ...)')
+    parser.add_argument('-c', '--cage', type=int, default=4, help='largest cage size')
+    parser.add_argument('-m', '--models', default='cages,tables', help='comma separated models')
+    parser.add_argument('-p', '--props', default='prop_FC,prop_GAC', help='comma separated propagators')
+    args = parser.parse_args(argv)
+    print('%5s %-7s %-9s %9s %9s %8s' % ('board', 'model', 'prop', 'decisions', 'prunings', 'seconds'))
+    totals = dict()
+    for seed in range(args.boards):
+        board, square = random_board(args.size, seed, args.cage)
+        for model in args.models.split(','):
+            for name in args.props.split(','):
+                decisions, prunings, seconds, solved = run(board, model, getattr(propagators, name))
+                totals[(model, name)] = totals.get((model, name), 0) + seconds
+                print('%5d %-7s %-9s %9d %9d %8.3f%s' % (seed, model, name, decisions, prunings, seconds,
+                                                        '' if solved else '  unsolved'))
+    for (model, name), seconds in sorted(totals.items()):
+        print('%5s %-7s %-9s %9s %9s %8.3f' % ('total', model, name, '', '', seconds))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
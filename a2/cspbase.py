@@ -13,6 +13,8 @@ Constraint Satisfaction Routines and Objects
 2. Constraint object
     - This class allows one to define constraints specified by tables of 
       satisfying assignments.
+    - The table is a Relation object, which can be shared by all the 
+      constraints with the same table.
     - On initialization, the variables that the constraint is over is specified 
       (i.e. the scope of the constraint). This must be an ORDERED list of 
       variables. This list of variables cannot be changed once the constraint 
@@ -20,12 +22,20 @@ Constraint Satisfaction Routines and Objects
     - Once initialized, one can incrementally add lists of satisfying tuples. 
       Each tuple specifies a value for each variable in the constraint (in the 
       same ORDER that the variables of the constraint were specified in).
+    - IntensionalConstraint is a Constraint given by a check function instead 
+      of a table, optionally with its own support test and filtering routine, 
+      so that its satisfying tuples never have to be enumerated.
+    - AllDifferent is an IntensionalConstraint requiring distinct values, with 
+      a filtering routine based on bipartite matching (or, more cheaply, on 
+      Hall intervals of the domain bounds).
 
 3. CSP object
     - Class for packing up a set of variables into a CSP problem. 
     - Contains various utility routines for accessing the problem. 
     - The variables of the CSP can be added later or on initialization. 
     - The constraints must be added later.
+    - Keeps a trail of the values pruned during search, which BT unwinds to 
+      a mark when it backtracks.
 
 4. BT object
     - A class to encapsulate things like statistics and bookeeping for 
@@ -43,6 +53,7 @@ Constraint Satisfaction Routines and Objects
 
 import time
 import functools
+from itertools import chain, product
 
 class Variable: 
     '''
@@ -54,8 +65,10 @@ class Variable:
     The variable object offers two types of functionality to support
     search.
 
-    (a) It has a current domain, implimented as a set of flags 
-    determining which domain values are "current", i.e., unpruned.
+    (a) It has a current domain, implimented as a bitset: bit i of the integer
+    'curdom' is set while the i-th domain value is "current", i.e., unpruned.
+    A dictionary from values to their index and a count of the set bits make
+    pruning, restoring, membership and size all constant time.
     - you can prune a value, and restore it.
     - you can obtain a list of values in the current domain, or count
         how many are still there
@@ -89,9 +102,12 @@ class Variable:
         specify the initial domain.
         '''
         self.name          = name                 # Text name for variable
-        self.dom           = list(domain)         # Make a copy of passed domain
-        self.curdom        = [True] * len(domain) # Using list
+        self.dom           = []                   # Permanent domain values
+        self.index         = dict()               # Value -> index into dom
+        self.curdom        = 0                    # Bitset over dom
+        self.curdom_size   = 0                    # Number of bits set in curdom
         self.assignedValue = None                 # For bt_search
+        self.add_domain_values(domain)
 
     def add_domain_values(self, values):
         '''
@@ -99,8 +115,10 @@ class Variable:
         removals.
         '''
         for val in values: 
+            self.index.setdefault(val, len(self.dom))
+            self.curdom |= 1 << len(self.dom)
+            self.curdom_size += 1
             self.dom.append(val)
-            self.curdom.append(True)
 
     def domain_size(self):
         '''Return the size of the (permanent) domain'''
@@ -113,24 +131,31 @@ class Variable:
     # Methods for current domain (pruning and unpruning)
     def prune_value(self, value):
         '''Remove value from CURRENT domain'''
-        self.curdom[self.value_index(value)] = False
+        bit = 1 << self.index[value]
+        if self.curdom & bit:
+            self.curdom ^= bit
+            self.curdom_size -= 1
 
     def unprune_value(self, value):
         '''Restore value to CURRENT domain'''
-        self.curdom[self.value_index(value)] = True
+        bit = 1 << self.index[value]
+        if not self.curdom & bit:
+            self.curdom |= bit
+            self.curdom_size += 1
 
     def cur_domain(self):
         '''
         Return list of values in CURRENT domain (if assigned only assigned value 
         is viewed as being in current domain).
         '''
-        vals = []
         if self.is_assigned():
-            vals.append(self.get_assigned_value())
-        else:
-            for i, val in enumerate(self.dom):
-                if self.curdom[i]:
-                    vals.append(val)
+            return [self.get_assigned_value()]
+        vals = []
+        bits = self.curdom
+        while bits:
+            low = bits & -bits
+            vals.append(self.dom[low.bit_length() - 1])
+            bits ^= low
         return vals
 
     def in_cur_domain(self, value):
@@ -138,12 +163,13 @@ class Variable:
         Check if value is in CURRENT domain (without constructing list) if 
         assigned only assigned value is viewed as being in current domain
         '''
-        if not value in self.dom:
+        i = self.index.get(value)
+        if i is None:
             return False
         if self.is_assigned():
             return value == self.get_assigned_value()
         else:
-            return self.curdom[self.value_index(value)]
+            return (self.curdom >> i) & 1 == 1
 
     def cur_domain_size(self):
         '''
@@ -152,12 +178,12 @@ class Variable:
         if self.is_assigned():
             return 1
         else:
-            return(sum(1 for v in self.curdom if v))
+            return self.curdom_size
 
     def restore_curdom(self):
         '''Return all values back into CURRENT domain'''
-        for i in range(len(self.curdom)):
-            self.curdom[i] = True
+        self.curdom = (1 << len(self.dom)) - 1
+        self.curdom_size = len(self.dom)
 
     #methods for assigning and unassigning
     def is_assigned(self):
@@ -192,7 +218,7 @@ class Variable:
         Domain values need not be numbers, so return the index in the domain 
         list of a variable value.
         '''
-        return self.dom.index(value)
+        return self.index[value]
 
     def __repr__(self):
         return("Var-{}".format(self.name))
@@ -204,7 +230,80 @@ class Variable:
         '''Also print the variable domain and current domain'''
         print("Var--\"{}\": Dom = {}, CurDom = {}".format(self.name, 
                                                              self.dom, 
-                                                             self.curdom))
+                                                             [(self.curdom >> i) & 1 == 1 for i in range(len(self.dom))]))
+class Relation:
+    '''
+    A table of satisfying tuples of a given arity, indexed by the value at 
+    each position. A Relation is built and indexed once and can then be 
+    shared by any number of constraints over different scopes: supports[i] 
+    maps a value to the list of tuples with that value at position i, and a 
+    constraint maps each variable of its scope to its position.
+
+    Only the constraint that created a relation adds tuples to it (see 
+    Constraint.add_satisfying_tuples); a shared relation is treated as 
+    immutable.
+    '''
+
+    def __init__(self, arity, tuples=()):
+        self.arity = arity
+        self.tuples = dict()                          # tuple -> True, in order added
+        self.supports = [dict() for i in range(arity)] # value -> tuples, per position
+        self.masks = dict()                           # see support_masks
+        self.scoped = dict()                          # see scope_supports
+        self.add(tuples)
+
+    def add(self, tuples):
+        '''Add satisfying tuples to the relation'''
+        for x in tuples:
+            t = tuple(x)  #ensure we have an immutable tuple
+            if t in self.tuples:
+                continue
+            self.tuples[t] = True
+            for i, val in enumerate(t):
+                self.supports[i].setdefault(val, []).append(t)
+        self.masks.clear()
+        self.scoped.clear()
+
+    def copy(self):
+        return Relation(self.arity, self.tuples)
+
+    def support_masks(self, domains):
+        '''
+        For a list giving the (permanent) domain of the variable at each 
+        position, return a list of lists: entry [i][k] is the bitset of the 
+        numbers of the tuples (in the order added) whose value at position i 
+        is the k-th value of that domain. Cached for each list of domains, so 
+        constraints over variables with the same domains share them.
+        '''
+        key = tuple(tuple(dom) for dom in domains)
+        if key not in self.masks:
+            number = dict((t, n) for n, t in enumerate(self.tuples))
+            masks = []
+            for i, dom in enumerate(key):
+                sup = self.supports[i]
+                masks.append([sum(1 << number[t] for t in sup.get(val, ())) for val in dom])
+            self.masks[key] = masks
+        return self.masks[key]
+
+    def scope_supports(self, scope):
+        '''
+        For an ordered scope of variables, return a dictionary from (var, val) 
+        to the list of tuples with the value val at the (first) position of 
+        var. Cached for each scope, so it is built once however often it is 
+        asked for; the dictionary is shared and must not be modified.
+        '''
+        key = tuple(scope)
+        if key not in self.scoped:
+            sup = dict()
+            for i in reversed(range(len(key))):
+                for val, tuples in self.supports[i].items():
+                    sup[(key[i], val)] = tuples
+            self.scoped[key] = sup
+        return self.scoped[key]
+
+    def __len__(self):
+        return len(self.tuples)
+
 class Constraint: 
     '''
     Class for defining constraints variable objects specifes an ordering over 
@@ -213,7 +312,7 @@ class Constraint:
     the constraint
     '''
 
-    def __init__(self, name, scope): 
+    def __init__(self, name, scope, relation=None): 
         '''
         Create a constraint object, specify the constraint name (a string) and 
         its scope (an ORDERED list of variable objects). The order of the 
@@ -223,6 +322,11 @@ class Constraint:
         each tuple specifies a value for each variable in the scope such that 
         this sequence of values satisfies the constraints).
 
+        The tuples are kept in a Relation. Many constraints of a model often 
+        have the same table (e.g., every not-equal constraint of a grid), so 
+        one Relation can be built once and passed to all of them; otherwise 
+        the constraint starts with an empty relation of its own.
+
         NOTE: This is a very space expensive representation...a proper 
         constraint object would allow for representing the constraint with a 
         function.  
@@ -230,29 +334,52 @@ class Constraint:
 
         self.scope = list(scope)
         self.name = name
-        self.sat_tuples = dict()
+        self.relation = relation if relation is not None else Relation(len(self.scope))
+        self.shared = relation is not None
 
-        # The next object data item 'sup_tuples' will be used to help support 
-        # GAC propgation. It allows access to a list of satisfying tuples that 
-        # contain a particular variable/value pair.
-        self.sup_tuples = dict()
+        # Position of each variable in the scope, to find its value's 
+        # supporting tuples in the relation.
+        self.position = dict()
+        for i, var in enumerate(self.scope):
+            self.position.setdefault(var, i)
+
+        # 'residues' remembers, for each variable/value pair, the index in its 
+        # list of supporting tuples of the last support found, so has_support 
+        # can check that tuple first and resume its scan from there.
+        self.residues = dict()
 
     def add_satisfying_tuples(self, tuples):
         '''
         We specify the constraint by adding its complete list of satisfying 
-        tuples.
+        tuples. A shared relation is copied first so that the other 
+        constraints sharing it are not changed.
         '''
-        for x in tuples:
-            t = tuple(x)  #ensure we have an immutable tuple
-            if not t in self.sat_tuples:
-                self.sat_tuples[t] = True
+        if self.shared:
+            self.relation = self.relation.copy()
+            self.shared = False
+        self.relation.add(tuples)
+
+    @property
+    def sat_tuples(self):
+        '''Dictionary whose keys are the satisfying tuples'''
+        return self.relation.tuples
+
+    @property
+    def sup_tuples(self):
+        '''
+        Dictionary from (var, val) to the list of satisfying tuples containing 
+        that variable/value pair, cached on the relation for this scope (see 
+        Relation.scope_supports); has_support uses the relation's index 
+        directly.
+        '''
+        return self.relation.scope_supports(self.scope)
 
-            #now put t in as a support for all of the variable values in it
-            for i, val in enumerate(t):
-                var = self.scope[i]
-                if not (var,val) in self.sup_tuples:
-                    self.sup_tuples[(var,val)] = []
-                self.sup_tuples[(var,val)].append(t)
+    def supporting_tuples(self, var, val):
+        '''List of the satisfying tuples in which var has the value val'''
+        i = self.position.get(var)
+        if i is None:
+            return None
+        return self.relation.supports[i].get(val)
 
     def get_scope(self):
         '''Get the list of variables that the constraint is over'''
@@ -266,7 +393,7 @@ class Constraint:
         list of values are must be ordered in the same order as the list of 
         variables in the constraints scope.
         '''
-        return tuple(vals) in self.sat_tuples
+        return tuple(vals) in self.relation.tuples
 
     def get_n_unasgn(self):
         '''
@@ -294,11 +421,20 @@ class Constraint:
         Test if a variable value pair has a supporting tuple (a set of 
         assignments satisfying the constraint where each value is still in the 
         corresponding variables current domain.
+
+        The scan starts at the last support found for the pair (its residue) 
+        and wraps around to the start of the list, so a residue is only ever a 
+        hint: it needs no restoring when search backtracks.
         '''
-        if (var, val) in self.sup_tuples:
-            for t in self.sup_tuples[(var, val)]:
-                if self.tuple_is_valid(t):
-                    return True
+        tuples = self.supporting_tuples(var, val)
+        if not tuples:
+            return False
+        key = (var, val)
+        start = self.residues.get(key, 0)
+        for i in chain(range(start, len(tuples)), range(start)):
+            if self.tuple_is_valid(tuples[i]):
+                self.residues[key] = i
+                return True
         return False
 
     def tuple_is_valid(self, t):
@@ -311,9 +447,269 @@ class Constraint:
                 return False
         return True
 
+    # Constraints with a routine of their own for pruning all of their 
+    # variables at once set filter to it; see IntensionalConstraint.
+    filter = None
+
     def __str__(self):
         return("{}({})".format(self.name,[var.name for var in self.scope]))
 
+class IntensionalConstraint(Constraint):
+    '''
+    A constraint defined by a function rather than a table of satisfying 
+    tuples, for relations (all-different, arithmetic) whose tables are too 
+    large to enumerate.
+    '''
+
+    def __init__(self, name, scope, check_fn, support_fn=None, filter_fn=None):
+        '''
+        Create a constraint with name and (ORDERED) scope whose satisfying 
+        tuples are the ones for which check_fn(vals) is true, vals being a 
+        tuple with one value for each variable of the scope.
+
+        support_fn(constraint, var, val), if given, replaces the generic 
+        has_support, which searches the product of the other variables' 
+        current domains.
+
+        filter_fn(constraint, csp), if given, becomes the filter method: it 
+        must prune (with csp.prune_value) the values of the scope variables 
+        that have no support and return (False, []) on a domain wipe out, 
+        otherwise (True, list of the variables that lost values). The GAC 
+        propagators then call it instead of revising values one by one.
+        '''
+        Constraint.__init__(self, name, scope)
+        self.check_fn = check_fn
+        self.support_fn = support_fn
+        if filter_fn is not None:
+            self.filter = lambda csp: filter_fn(self, csp)
+
+    def add_satisfying_tuples(self, tuples):
+        print("WARNING: Trying to add satisfying tuples to intensional constraint ", self)
+
+    def check(self, vals):
+        return bool(self.check_fn(tuple(vals)))
+
+    def has_support(self, var, val):
+        '''
+        Test if a variable value pair has a supporting tuple. Unless a 
+        support_fn was given, the last support found for the pair (its 
+        residue) is tried first, then the product of the current domains of 
+        the other variables is searched.
+        '''
+        if self.support_fn is not None:
+            return self.support_fn(self, var, val)
+        key = (var, val)
+        t = self.residues.get(key)
+        if t is not None and self.tuple_is_valid(t):
+            return True
+        i = self.scope.index(var)
+        domains = [v.cur_domain() for v in self.scope]
+        domains[i] = [val] if val in domains[i] else []
+        for t in product(*domains):
+            if self.check_fn(t):
+                self.residues[key] = t
+                return True
+        return False
+
+class AllDifferent(IntensionalConstraint):
+    '''
+    Global constraint that every variable in the scope takes a different 
+    value. The filter method enforces GAC with Regin's algorithm: a maximum 
+    matching of variables to values is repaired from the one found by the 
+    previous call, and a value is pruned unless its edge is matched, lies on 
+    an alternating path from a free value, or lies in a strongly connected 
+    component of the oriented value graph with its variable.
+
+    With bounds=True the filter only enforces bounds consistency: it looks for 
+    Hall intervals [lo, hi] holding exactly hi - lo + 1 domains and moves the 
+    bounds of the other domains out of them. This needs integer values; it 
+    prunes less but is cheaper.
+    '''
+
+    def __init__(self, name, scope, bounds=False):
+        IntensionalConstraint.__init__(self, name, scope, 
+                                       lambda t: len(set(t)) == len(t))
+        self.bounds = bounds
+        self.matching = [None] * len(scope) # Value matched to each variable
+
+    def has_support(self, var, val):
+        '''
+        var = val has a support if the variables can still all be matched to 
+        different values with var matched to val.
+        '''
+        if not var.in_cur_domain(val):
+            return False
+        domains = [v.cur_domain() for v in self.scope]
+        domains[self.scope.index(var)] = [val]
+        return self.maximum_matching(domains, [None] * len(domains)) is not None
+
+    def maximum_matching(self, domains, matching):
+        '''
+        Extend matching, a list giving the value matched to each variable (or 
+        None), to a matching of every variable with augmenting paths. Values 
+        no longer in a variable's domain are dropped from the matching first. 
+        Returns the new matching, or None if some variable cannot be matched.
+        '''
+        match = [None] * len(domains)
+        owner = dict()
+        for i, val in enumerate(matching):
+            if val is not None and val not in owner and val in domains[i]:
+                match[i] = val
+                owner[val] = i
+
+        def augment(i, seen):
+            for val in domains[i]:
+                if val not in seen:
+                    seen.add(val)
+                    if val not in owner or augment(owner[val], seen):
+                        owner[val] = i
+                        match[i] = val
+                        return True
+            return False
+
+        for i in range(len(domains)):
+            if match[i] is None and not augment(i, set()):
+                return None
+        return match
+
+    def filter(self, csp):
+        '''
+        Prune the values that take part in no matching of all the variables. 
+        Returns (False, []) on a wipe out, otherwise True and the variables 
+        that lost values.
+        '''
+        domains = [v.cur_domain() for v in self.scope]
+        if self.bounds:
+            return self.filter_bounds(csp, domains)
+        match = self.maximum_matching(domains, self.matching)
+        if match is None:
+            return False, []
+        self.matching = match
+
+        # Variables are nodes 0..n-1 and values nodes n.. ; matched edges go 
+        # from variable to value, the other edges from value to variable.
+        n = len(domains)
+        node = dict()
+        for dom in domains:
+            for val in dom:
+                if val not in node:
+                    node[val] = n + len(node)
+        edges = [[] for i in range(n + len(node))]
+        for i, dom in enumerate(domains):
+            edges[i].append(node[match[i]])
+            for val in dom:
+                if val != match[i]:
+                    edges[node[val]].append(i)
+
+        # Edges on alternating paths from free values
+        matched = set(match)
+        reached = [False] * len(edges)
+        stack = [node[val] for val in node if val not in matched]
+        for x in stack:
+            reached[x] = True
+        while stack:
+            x = stack.pop()
+            for y in edges[x]:
+                if not reached[y]:
+                    reached[y] = True
+                    stack.append(y)
+
+        component = strongly_connected_components(edges)
+        changed = []
+        for i, var in enumerate(self.scope):
+            if var.is_assigned():
+                continue
+            for val in domains[i]:
+                x = node[val]
+                if val != match[i] and not reached[x] and component[x] != component[i]:
+                    csp.prune_value(var, val)
+                    if not changed or changed[-1] is not var:
+                        changed.append(var)
+        return True, changed
+
+    def filter_bounds(self, csp, domains):
+        '''
+        Bounds consistency with Hall intervals. An interval [lo, hi] holding 
+        more than hi - lo + 1 domains is a wipe out; one holding exactly that 
+        many is a Hall interval, whose values the other variables cannot take 
+        at their bounds.
+        '''
+        if not all(domains):
+            return False, []
+        changed = []
+        pruning = True
+        while pruning:
+            pruning = False
+            lows = sorted(set(min(dom) for dom in domains))
+            highs = sorted(set(max(dom) for dom in domains))
+            for lo in lows:
+                for hi in highs:
+                    if hi < lo:
+                        continue
+                    inside = [i for i, dom in enumerate(domains) 
+                              if lo <= min(dom) and max(dom) <= hi]
+                    if len(inside) > hi - lo + 1:
+                        return False, []
+                    if len(inside) < hi - lo + 1:
+                        continue
+                    for i, var in enumerate(self.scope):
+                        if i in inside or var.is_assigned():
+                            continue
+                        dom = domains[i]
+                        keep = list(dom)
+                        if lo <= min(dom) <= hi:
+                            keep = [val for val in keep if val > hi]
+                        if keep and lo <= max(keep) <= hi:
+                            keep = [val for val in keep if val < lo]
+                        if len(keep) == len(dom):
+                            continue
+                        if not keep:
+                            return False, []
+                        for val in dom:
+                            if val not in keep:
+                                csp.prune_value(var, val)
+                        domains[i] = keep
+                        if var not in changed:
+                            changed.append(var)
+                        pruning = True
+        return True, changed
+
+def strongly_connected_components(edges):
+    '''
+    Tarjan's algorithm on the graph whose node x has the successors 
+    edges[x]. Returns a list giving the component number of each node.
+    '''
+    index = [None] * len(edges)
+    low = [0] * len(edges)
+    component = [None] * len(edges)
+    stack, on_stack = [], [False] * len(edges)
+    counter = [0, 0] # next index, next component
+
+    def visit(x):
+        index[x] = low[x] = counter[0]
+        counter[0] += 1
+        stack.append(x)
+        on_stack[x] = True
+        for y in edges[x]:
+            if index[y] is None:
+                visit(y)
+                low[x] = min(low[x], low[y])
+            elif on_stack[y]:
+                low[x] = min(low[x], index[y])
+        if low[x] == index[x]:
+            while True:
+                y = stack.pop()
+                on_stack[y] = False
+                component[y] = counter[1]
+                if y == x:
+                    break
+            counter[1] += 1
+
+    for x in range(len(edges)):
+        if index[x] is None:
+            visit(x)
+    return component
+
 class CSP:
     '''
     Class for packing up a set of variables into a CSP problem. Contains various 
@@ -330,6 +726,7 @@ class CSP:
         self.vars = []
         self.cons = []
         self.vars_to_cons = dict()
+        self.trail = []     # (Variable, value) prunings, undone by bt_search
         for v in vars:
             self.add_var(v)
 
@@ -351,7 +748,7 @@ class CSP:
         Add constraint to CSP. Note that all variables in the constraints scope 
         must already have been added to the CSP.
         '''
-        if not type(c) is Constraint:
+        if not isinstance(c, Constraint):
             print("WARNING: Trying to add non constraint ", c, " to CSP object")
         else:
             for v in c.scope:
@@ -385,6 +782,35 @@ class CSP:
         '''
         return [v for v in self.vars if not v.is_assigned()]
 
+    def prune_value(self, var, value):
+        '''
+        Prune value from the current domain of var and push the pruning onto 
+        the trail, so that bt_search can undo it when it backtracks.
+        '''
+        var.prune_value(value)
+        self.trail.append((var, value))
+
+    def trail_mark(self):
+        '''
+        Return a mark for the current top of the trail, to be passed later to 
+        undo_to or pruned_since.
+        '''
+        return len(self.trail)
+
+    def pruned_since(self, mark):
+        '''Return list of the (Variable, value) prunings made since mark.'''
+        return self.trail[mark:]
+
+    def undo_to(self, mark):
+        '''
+        Pop the trail back to mark, restoring every value pruned since then to 
+        its variable's current domain (most recent pruning first).
+        '''
+        trail = self.trail
+        while len(trail) > mark:
+            var, val = trail.pop()
+            var.unprune_value(val)
+
     def print_all(self):
         print("CSP", self.name)
         print("   Variables = ", self.vars)
@@ -440,20 +866,34 @@ class BT:
         print("Search made {} variable assignments and pruned {} variable values".format(
             self.nDecisions, self.nPrunings))
 
-    def restoreValues(self,prunings):
-        '''
-        Restore list of values to variable domains each item in prunings is a 
-        pair (var, val).
-        '''
-        for var, val in prunings:
-            var.unprune_value(val)
-
     def restore_all_variable_domains(self):
         '''Reinitialize all variable domains'''
         for var in self.csp.vars:
             if var.is_assigned():
                 var.unassign()
             var.restore_curdom()
+        del self.csp.trail[:]
+
+    def propagate(self, propagator, var=None):
+        '''
+        Call propagator and make sure every value it pruned is on the CSP's 
+        trail. Old-style propagators prune through Variable.prune_value and 
+        only return their prunings, so if the trail did not grow the returned 
+        prunings are pushed onto it here. Returns (status, prunings).
+        '''
+        mark = self.csp.trail_mark()
+        if var is None:
+            result = propagator(self.csp)
+        else:
+            result = propagator(self.csp, var)
+        if type(result) is tuple:
+            status, prunings = result
+        else:
+            status, prunings = result, self.csp.pruned_since(mark)
+        if self.csp.trail_mark() == mark:
+            self.csp.trail.extend(prunings)
+        self.nPrunings = self.nPrunings + self.csp.trail_mark() - mark
+        return status, prunings
 
     def restoreUnasgnVar(self, var):
         '''Add variable back to list of unassigned vars'''
@@ -483,10 +923,15 @@ class BT:
              in this case bt_search will backtrack
            return is true if we can continue.
 
-           The list of variable values pairs are all of the values
-           the propagator pruned (using the variable's prune_value method). 
-           bt_search NEEDS to know this in order to correctly restore these 
-           values when it undoes a variable assignment.
+           The propagator should prune values with the csp's prune_value 
+           method, which pushes each pruning onto the csp's trail. bt_search 
+           marks the trail before each assignment and undoes everything above 
+           the mark when it backtracks, so the list of pairs returned is only 
+           informational and the propagator may return just True/False.
+
+           Old-style propagators that prune with the variable's prune_value 
+           method still work: when the trail has not grown, the list of 
+           (Variable, Value) pairs they return is pushed onto it for them.
 
            NOTE propagator SHOULD NOT prune a value that has already been 
            pruned! Nor should it prune a value twice
@@ -505,8 +950,7 @@ class BT:
             if not v.is_assigned():
                 self.unasgn_vars.append(v)
 
-        status, prunings = propagator(self.csp) #initial propagate no assigned variables.
-        self.nPrunings = self.nPrunings + len(prunings)
+        status, prunings = self.propagate(propagator) #initial propagate no assigned variables.
 
         if self.LOG_LEVEL > 1:
             print(len(self.unasgn_vars), " unassigned variables at start of search")
@@ -518,7 +962,7 @@ class BT:
         else:
             status = self.bt_recurse(propagator, var_ord, val_ord, 1)   #now do recursive search
 
-        self.restoreValues(prunings)
+        self.csp.undo_to(0)
 
         if self.LOG_LEVEL > 0:
             if status == False:
@@ -563,11 +1007,11 @@ class BT:
                 if self.LOG_LEVEL > 1:
                     print('  ' * level, "bt_recurse trying", var, "=", val)
 
+                mark = self.csp.trail_mark()
                 var.assign(val)
                 self.nDecisions = self.nDecisions+1
 
-                status, prunings = propagator(self.csp, var)
-                self.nPrunings = self.nPrunings + len(prunings)
+                status, prunings = self.propagate(propagator, var)
 
                 if self.LOG_LEVEL > 1:
                     print('  ' * level, "bt_recurse prop status = ", status)
@@ -579,7 +1023,7 @@ class BT:
 
                 if self.LOG_LEVEL > 1:
                     print('  ' * level, "bt_recurse restoring ", prunings)
-                self.restoreValues(prunings)
+                self.csp.undo_to(mark)
                 var.unassign()
 
             self.restoreUnasgnVar(var)
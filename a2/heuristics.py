@@ -45,11 +45,11 @@ def val_lcv(csp, var):
     domains = var.cur_domain().copy()
     affected = {}
     for d in domains:
+        mark = csp.trail_mark()
         var.assign(d)
         flag, pruned = prop_GAC(csp, var)
         if flag:
             affected[d] = len(pruned)
-        for v, d in pruned:
-            v.unprune_value(d)
+        csp.undo_to(mark)
         var.unassign()
     return sorted(affected, key=affected.__getitem__, reverse=True)
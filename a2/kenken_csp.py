@@ -21,17 +21,175 @@ The grid-only models do not need to encode the cage constraints.
 2. nary_ad_grid (worth 10/100 marks)
     - A model of a KenKen grid (without cage constraints) built using only n-ary 
       all-different constraints for both the row and column constraints. 
+    - The all-different constraints are cspbase AllDifferent constraints, so 
+      no table of the n! permutations is built.
 
 3. kenken_csp_model (worth 20/100 marks) 
     - A model built using your choice of (1) binary binary not-equal, or (2) 
       n-ary all-different constraints for the grid.
-    - Together with KenKen cage constraints.
+    - Together with KenKen cage constraints. These are SumCage, 
+      DifferenceCage, QuotientCage and ProductCage constraints, which filter 
+      with arithmetic instead of tables; with table_cages=True each cage is a 
+      table of its satisfying tuples instead.
+    - Cage tables are generated from the multisets meeting the target and 
+      kept in CAGE_TUPLES; given a cache_file, they are also loaded from and 
+      saved to that file. Cages with the same table share one Relation.
+    - binary_ne_grid shares one not-equal Relation among all of its 
+      constraints.
 
 '''
 
-from itertools import permutations, product
-from cspbase import Variable, Constraint, CSP
+import os
+import pickle
+from itertools import permutations, product, combinations_with_replacement
+from cspbase import Variable, Relation, Constraint, IntensionalConstraint, AllDifferent, CSP
 from functools import reduce
+from operator import add, mul, sub, floordiv
+
+class CageConstraint(IntensionalConstraint):
+    '''
+    A KenKen cage: the values of its cells combine to target. Subclasses 
+    define satisfies(vals); the filter here keeps the values that appear in 
+    some satisfying tuple of the current domains, which is exact but 
+    enumerates their product, and the subclasses replace it where arithmetic 
+    does better. Every cage filter is exact, so prop_GAC enforces GAC on the 
+    cages as it would on their tables.
+    '''
+
+    def __init__(self, name, scope, target):
+        IntensionalConstraint.__init__(self, name, scope, self.satisfies)
+        self.target = target
+
+    def filter(self, csp):
+        domains = [var.cur_domain() for var in self.scope]
+        supported = [set() for var in self.scope]
+        for t in product(*domains):
+            if self.satisfies(t):
+                for i, val in enumerate(t):
+                    supported[i].add(val)
+        return self.keep(csp, domains, supported)
+
+    def reachable_filter(self, csp, combine, identity, need):
+        '''
+        Exact filter for cages whose cells combine with an associative and 
+        commutative operation. prefix[i] holds the values the cells before i 
+        can combine to and suffix[i] those the cells after i can, keeping 
+        only x with need(x) not None, where need(x) is the y that makes 
+        combine(x, y) equal target. A value v of cell i is kept if 
+        need(combine(a, v)) is in suffix[i] for some a in prefix[i].
+        '''
+        domains = [var.cur_domain() for var in self.scope]
+        prefix = [set([identity])]
+        for dom in domains[:-1]:
+            prefix.append(set(x for x in (combine(a, v) for a in prefix[-1] for v in dom) 
+                              if need(x) is not None))
+        suffix = [set([identity])]
+        for dom in reversed(domains[1:]):
+            suffix.append(set(x for x in (combine(b, v) for b in suffix[-1] for v in dom) 
+                              if need(x) is not None))
+        suffix.reverse()
+        supported = []
+        for i, dom in enumerate(domains):
+            supported.append(set(v for v in dom 
+                                 if any(need(combine(a, v)) in suffix[i] for a in prefix[i])))
+        return self.keep(csp, domains, supported)
+
+    def keep(self, csp, domains, supported):
+        '''
+        Prune from each variable the values of domains not in supported. 
+        Returns (False, []) if a variable would lose all of its values or an 
+        assigned value is not supported, otherwise True and the variables 
+        that lost values.
+        '''
+        changed = []
+        for i, var in enumerate(self.scope):
+            lost = [val for val in domains[i] if val not in supported[i]]
+            if not lost:
+                continue
+            if var.is_assigned() or len(lost) == len(domains[i]):
+                return False, []
+            for val in lost:
+                csp.prune_value(var, val)
+            changed.append(var)
+        return True, changed
+
+class SumCage(CageConstraint):
+    '''Cage whose values add up to target; filters on reachable partial sums'''
+
+    def satisfies(self, vals):
+        return sum(vals) == self.target
+
+    def filter(self, csp):
+        '''A value v of a cell is kept if the other cells can add up to target - v'''
+        return self.reachable_filter(csp, add, 0, lambda x: self.target - x)
+
+class ProductCage(CageConstraint):
+    '''Cage whose values multiply to target; filters on reachable partial products'''
+
+    def satisfies(self, vals):
+        return reduce(lambda x, y: x * y, vals, 1) == self.target
+
+    def filter(self, csp):
+        '''
+        A value v of a cell is kept if the other cells can multiply to target 
+        / v; only divisors of target are tracked as partial products.
+        '''
+        t = self.target
+        if t == 0:
+            return CageConstraint.filter(self, csp)
+        return self.reachable_filter(csp, mul, 1, 
+                                     lambda x: t // x if x != 0 and t % x == 0 else None)
+
+class DifferenceCage(CageConstraint):
+    '''
+    Cage for which subtracting its values from one another in some order 
+    gives target; for two cells, |a - b| = target.
+    '''
+
+    def satisfies(self, vals):
+        return any(reduce(sub, p) == self.target for p in permutations(vals))
+
+    def filter(self, csp):
+        '''For a pair of cells v is kept if v - target or v + target is left in the other cell'''
+        if len(self.scope) != 2:
+            return CageConstraint.filter(self, csp)
+        domains = [var.cur_domain() for var in self.scope]
+        supported = []
+        for i in (0, 1):
+            other = set(domains[1 - i])
+            supported.append(set(val for val in domains[i] 
+                                 if val - self.target in other or val + self.target in other))
+        return self.keep(csp, domains, supported)
+
+class QuotientCage(CageConstraint):
+    '''
+    Cage for which dividing (with integer division) its values by one another 
+    in some order gives target; for two cells, a // b = target or b // a = 
+    target.
+    '''
+
+    def satisfies(self, vals):
+        return any(reduce(floordiv, p) == self.target for p in permutations(vals))
+
+    def filter(self, csp):
+        '''
+        For a pair of cells with target t > 0, v is kept if the other cell has 
+        a w with w // v = t, i.e. t*v <= w < (t+1)*v, or with v // w = t, 
+        i.e. v // (t+1) < w <= v // t.
+        '''
+        t = self.target
+        if len(self.scope) != 2 or t <= 0:
+            return CageConstraint.filter(self, csp)
+        domains = [var.cur_domain() for var in self.scope]
+        supported = []
+        for i in (0, 1):
+            other = domains[1 - i]
+            supported.append(set(v for v in domains[i] if v > 0 and 
+                                 any(t*v <= w < (t+1)*v or v//(t+1) < w <= v//t for w in other)))
+        return self.keep(csp, domains, supported)
+
+# Cage constraint class for each operation code of a kenken_grid cage
+CAGES = {0: SumCage, 1: DifferenceCage, 2: QuotientCage, 3: ProductCage}
 
 def binary_ne_grid(kenken_grid):
     n = kenken_grid[0][0]
@@ -39,17 +197,12 @@ def binary_ne_grid(kenken_grid):
     for i in range(n):
         variables.append([Variable("%d%d"%(i,j), domain=list(range(1,n+1))) for j in range(n)])
 
-    tuples = [t for t in permutations(list(range(1,n+1)), 2)]
+    not_equal = Relation(2, permutations(list(range(1,n+1)), 2))
     for i in range(n):
         for j in range(n):
             for k in range(j+1, n):
-                cons = Constraint("r%d%d%d"%(i,j,k), [variables[i][j], variables[i][k]])
-                cons.add_satisfying_tuples(tuples)
-                constraints.append(cons)
-
-                cons = Constraint("c%d%d%d"%(i,j,k), [variables[j][i], variables[k][i]])
-                cons.add_satisfying_tuples(tuples)
-                constraints.append(cons)
+                constraints.append(Constraint("r%d%d%d"%(i,j,k), [variables[i][j], variables[i][k]], not_equal))
+                constraints.append(Constraint("c%d%d%d"%(i,j,k), [variables[j][i], variables[k][i]], not_equal))
 
     csp = CSP("binary_ne_grid", [v for row in variables for v in row])
     for cons in constraints:
@@ -62,15 +215,9 @@ def nary_ad_grid(kenken_grid):
     for i in range(n):
         variables.append([Variable("%d%d"%(i,j), domain=list(range(1,n+1))) for j in range(n)])
 
-    tuples = [t for t in permutations(list(range(1,n+1)))]
     for i in range(n):
-        cons = Constraint("r%d"%i, variables[i])
-        cons.add_satisfying_tuples(tuples)
-        constraints.append(cons)
-
-        cons = Constraint("c%d"%i, [variables[j][i] for j in range(n)])
-        cons.add_satisfying_tuples(tuples)
-        constraints.append(cons)
+        constraints.append(AllDifferent("r%d"%i, variables[i]))
+        constraints.append(AllDifferent("c%d"%i, [variables[j][i] for j in range(n)]))
 
     csp = CSP("nary_ad_grid", [v for row in variables for v in row])
     for cons in constraints:
@@ -80,32 +227,112 @@ def nary_ad_grid(kenken_grid):
 def getij(x):
     return x // 10 - 1, x % 10 - 1
 
-def kenken_csp_model(kenken_grid):
+# (n, operation, target, size) -> satisfying tuples of a table cage
+CAGE_TUPLES = dict()
+# (n, operation, target, size) -> Relation of those tuples
+CAGE_RELATIONS = dict()
+
+def sum_multisets(total, size, low, n):
+    '''Nondecreasing tuples of size values in low..n adding up to total'''
+    if size == 0:
+        if total == 0:
+            yield ()
+        return
+    for v in range(low, min(n, total // size) + 1):
+        for rest in sum_multisets(total - v, size - 1, v, n):
+            yield (v,) + rest
+
+def product_multisets(total, size, low, n):
+    '''Nondecreasing tuples of size values in low..n multiplying to total'''
+    if size == 0:
+        if total == 1:
+            yield ()
+        return
+    for v in range(low, n + 1):
+        if v ** size > total:
+            break
+        if total % v == 0:
+            for rest in product_multisets(total // v, size - 1, v, n):
+                yield (v,) + rest
+
+def cage_multisets(n, operation, target, size):
+    '''
+    Nondecreasing tuples of size values in 1..n that some ordering of makes 
+    the cage hold. Subtracting the others from x gives 2x - sum, and dividing 
+    x by the others gives x // (product / x), so for - and / it is enough to 
+    try each value as the first.
+    '''
+    if operation == 0:
+        return sum_multisets(target, size, 1, n)
+    if operation == 3:
+        return product_multisets(target, size, 1, n)
+    found = []
+    for m in combinations_with_replacement(range(1, n + 1), size):
+        if operation == 1:
+            total = sum(m)
+            if any(2 * x - total == target for x in m):
+                found.append(m)
+        else:
+            total = reduce(lambda x, y: x * y, m, 1)
+            if any(x // (total // x) == target for x in m):
+                found.append(m)
+    return found
+
+def cage_tuples(n, operation, target, size):
+    '''
+    Return the satisfying tuples of a table cage of size cells with the given 
+    operation code and target on an n by n board: every ordering of every 
+    multiset from cage_multisets. Results are kept in CAGE_TUPLES.
+    '''
+    key = (n, operation, target, size)
+    if key not in CAGE_TUPLES:
+        tuples = set()
+        for m in cage_multisets(n, operation, target, size):
+            tuples.update(permutations(m))
+        CAGE_TUPLES[key] = sorted(tuples)
+    return CAGE_TUPLES[key]
+
+def cage_relation(n, operation, target, size):
+    '''
+    Return the Relation of the tuples from cage_tuples, shared by every cage 
+    with the same (n, operation, target, size). Kept in CAGE_RELATIONS.
+    '''
+    key = (n, operation, target, size)
+    if key not in CAGE_RELATIONS:
+        CAGE_RELATIONS[key] = Relation(size, cage_tuples(n, operation, target, size))
+    return CAGE_RELATIONS[key]
+
+def load_cage_tuples(path):
+    '''Add the cage tables saved in the file at path, if any, to CAGE_TUPLES'''
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            CAGE_TUPLES.update(pickle.load(f))
+
+def save_cage_tuples(path):
+    '''Save CAGE_TUPLES to the file at path'''
+    with open(path, 'wb') as f:
+        pickle.dump(CAGE_TUPLES, f)
+
+def kenken_csp_model(kenken_grid, table_cages=False, cache_file=None):
     n = kenken_grid[0][0]
     csp, variables = nary_ad_grid(kenken_grid)
     csp.name = 'kenken_csp_model'
-    operations = {
-        0: lambda x, y: x + y,
-        1: lambda x, y: x - y,
-        2: lambda x, y: x // y,
-        3: lambda x, y: x * y,
-    }
+    if table_cages and cache_file:
+        load_cage_tuples(cache_file)
+    cached = len(CAGE_TUPLES)
     for raw_constraint in kenken_grid[1:]:
         if len(raw_constraint) == 2:
             i, j = getij(raw_constraint[0])
             cons = Constraint(str(raw_constraint), [variables[i][j]])
-            tuples = [[raw_constraint[1]]]
+            cons.add_satisfying_tuples([[raw_constraint[1]]])
+        elif table_cages:
+            vars = [variables[i][j] for i, j in map(getij, raw_constraint[:-2])]
+            relation = cage_relation(n, raw_constraint[-1], raw_constraint[-2], len(vars))
+            cons = Constraint(str(raw_constraint), vars, relation)
         else:
-            vars, tuples = [], []
-            for x in raw_constraint[:-2]:
-                i, j = getij(x)
-                vars.append(variables[i][j])
-            cons = Constraint(str(raw_constraint), vars)
-            for l in product(list(range(1,n+1)), repeat=len(raw_constraint)-2):
-                if reduce(operations[raw_constraint[-1]], l) == raw_constraint[-2]:
-                    for per in permutations(l):
-                        if per not in tuples:
-                            tuples.append(per)
-        cons.add_satisfying_tuples(tuples)
+            vars = [variables[i][j] for i, j in map(getij, raw_constraint[:-2])]
+            cons = CAGES[raw_constraint[-1]](str(raw_constraint), vars, raw_constraint[-2])
         csp.add_constraint(cons)
+    if table_cages and cache_file and len(CAGE_TUPLES) > cached:
+        save_cage_tuples(cache_file)
     return csp, variables
@@ -25,9 +25,11 @@ The propagator returns True/False and a list of (Variable, Value) pairs, like so
 Propagators will return False if they detect a dead-end. In this case, bt_search 
 will backtrack. Propagators will return true if we can continue.
 
-The list of variable value pairs are all of the values that the propagator 
-pruned (using the variable's prune_value method). bt_search NEEDS to know this 
-in order to correctly restore these values when it undoes a variable assignment.
+Values are pruned with the csp's prune_value method, which pushes the pruning 
+onto the csp's trail; bt_search undoes the trail back to a mark when it undoes 
+a variable assignment. The list of variable value pairs is the prunings made by 
+this call (csp.pruned_since(mark)); bt_search does not need it, but it lets a 
+caller outside of search, such as val_lcv, see what was pruned.
 
 Propagators SHOULD NOT prune a value that has already been pruned! Nor should 
 they prune a value twice.
@@ -56,8 +58,15 @@ unassigned variable left
 
 3. For GAC we initialize the GAC queue with all constraints containing V.
 
+prop_CT enforces the same consistency as prop_GAC with Compact-Table filtering,
+and is processed like GAC: it starts from all constraints, or from those 
+containing V.
+
 '''
 
+from collections import deque
+from cspbase import IntensionalConstraint
+
 def prop_BT(csp, newVar=None):
     '''
     Do plain backtracking propagation. That is, do no propagation at all. Just 
@@ -81,43 +90,242 @@ def prop_FC(csp, newVar=None):
     Otherwise we do it with constraints containing newVar. Checks constraints
     that have exactly one uninstaniated variable in their scope.'''
     constraints = csp.get_cons_with_var(newVar) if newVar else csp.get_all_cons()
-    pruned = []
+    mark = csp.trail_mark()
     for cons in constraints:
         if cons.get_n_unasgn() == 1:
             var = cons.get_unasgn_vars()[0]
             for d in var.cur_domain():
                 if not cons.has_support(var, d):
-                    t = (var, d)
-                    if t not in pruned:
-                        pruned.append(t)
-                        var.prune_value(d)
+                    csp.prune_value(var, d)
             if var.cur_domain_size() == 0:
-                return False, pruned
-    return True, pruned
+                return False, csp.pruned_since(mark)
+    return True, csp.pruned_since(mark)
+
+def revise(cons, var, csp):
+    '''
+    Prune the values of var that have no support in cons. Returns (status, 
+    revised): status is False on a domain wipe out, or when var is assigned a 
+    value without support, and revised tells if any value was pruned.
+    '''
+    if var.is_assigned():
+        return cons.has_support(var, var.get_assigned_value()), False
+    revised = False
+    for d in var.cur_domain():
+        if not cons.has_support(var, d):
+            csp.prune_value(var, d)
+            revised = True
+    return var.cur_domain_size() > 0, revised
+
+def gac_arcs(cons, var=None):
+    '''
+    Return the arcs of cons to revise when var has lost values (all of its 
+    arcs if var is None). A constraint with a filter routine has the single 
+    arc (cons, None), which filters all of its variables.
+    '''
+    if cons.filter is not None:
+        return [(cons, None)]
+    return [(cons, v) for v in cons.scope if v is not var]
 
 def prop_GAC(csp, newVar=None):
     '''
     Do GAC propagation. If newVar is None we do initial GAC enforce processing 
     all constraints. Otherwise we do GAC enforce with constraints containing 
     newVar on GAC Queue.
+
+    The queue holds arcs (constraint, variable): revising an arc prunes the 
+    values of the variable that have no support in the constraint. When a 
+    variable loses values, the arcs of its constraints for the OTHER variables 
+    in their scopes are queued; the variable itself needs no revision since 
+    its remaining values were just checked. A set of the queued arcs keeps 
+    each arc on the queue at most once. Constraints with a filter routine are 
+    queued as one arc (constraint, None) and filtered as a whole.
     '''
-    queue = csp.get_cons_with_var(newVar) if newVar else csp.get_all_cons()
-    pruned = []
+    queue = deque()
+    if newVar:
+        for cons in csp.get_cons_with_var(newVar):
+            queue.extend(gac_arcs(cons, newVar if len(cons.scope) > 1 else None))
+    else:
+        for cons in csp.get_all_cons():
+            queue.extend(gac_arcs(cons))
+    queued = set(queue)
+    mark = csp.trail_mark()
 
     while queue:
-        cons = queue.pop(0)
-        for var in cons.get_scope():
-            for d in var.cur_domain():
-                if not cons.has_support(var, d):
-                    t = (var, d)
-                    if t not in pruned:
-                        pruned.append(t)
-                        var.prune_value(d)
-                    if var.cur_domain_size() == 0:
-                        queue.clear()
-                        return False, pruned
-                    else:
-                        for ncons in csp.get_cons_with_var(var):
-                            if ncons not in queue:
-                                queue.append(ncons)
-    return True, pruned
+        arc = queue.popleft()
+        queued.discard(arc)
+        cons, var = arc
+        if var is None:
+            status, changed = cons.filter(csp)
+        else:
+            status, revised = revise(cons, var, csp)
+            changed = [var] if revised else []
+        if not status:
+            return False, csp.pruned_since(mark)
+        for cvar in changed:
+            for ncons in csp.vars_to_cons[cvar]:
+                if ncons is cons and var is None:
+                    continue
+                for narc in gac_arcs(ncons, cvar):
+                    if narc not in queued:
+                        queued.add(narc)
+                        queue.append(narc)
+    return True, csp.pruned_since(mark)
+
+def popcount(bits):
+    return bin(bits).count('1')
+
+class CompactTable:
+    '''
+    Compact-Table state for one table constraint. The constraint's satisfying 
+    tuples are numbered, and an integer bitset over those numbers holds the 
+    tuples that are still valid, i.e. whose values are all still in the 
+    current domains. supports[i][k] is the bitset of the tuples that give the 
+    i-th variable of the scope the k-th value of its (permanent) domain; these 
+    come from the constraint's Relation and are shared with the other 
+    constraints of the relation over variables with the same domains.
+
+    The valid-tuple bitset is reversible through a stack of 
+    (domains, valid) entries, where domains is the bitset of each scope 
+    variable's current domain when valid was computed. valid is correct for 
+    any domains that are subsets of those, so after bt_search backtracks the 
+    entries whose domains are no longer supersets of the current ones are 
+    popped, and the top entry is brought up to date from the difference.
+    '''
+
+    def __init__(self, cons):
+        self.cons = cons
+        self.scope = cons.scope
+        self.relation = cons.relation
+        self.size = len(cons.relation)
+        self.supports = cons.relation.support_masks([var.dom for var in self.scope])
+        full = tuple((1 << var.domain_size()) - 1 for var in self.scope)
+        self.stack = [(full, self.reset_valid(full, (1 << self.size) - 1))]
+
+    def reset_valid(self, domains, valid):
+        '''Keep in valid only the tuples supported by every domain'''
+        for i, bits in enumerate(domains):
+            sup = self.supports[i]
+            mask = 0
+            while bits:
+                low = bits & -bits
+                mask |= sup[low.bit_length() - 1]
+                bits ^= low
+            valid &= mask
+        return valid
+
+    def current_domains(self):
+        '''Bitset of each scope variable's current domain'''
+        domains = []
+        for var in self.scope:
+            if var.is_assigned():
+                domains.append(1 << var.index[var.get_assigned_value()])
+            else:
+                domains.append(var.curdom)
+        return tuple(domains)
+
+    def update_valid(self, domains):
+        '''
+        Return the bitset of the tuples valid for domains, starting from the 
+        top stack entry whose domains contain them. Values removed since that 
+        entry are handled one by one if they are fewer than the values left, 
+        otherwise the supports of the values left are intersected.
+        '''
+        stack = self.stack
+        while len(stack) > 1:
+            old = stack[-1][0]
+            if all(d & ~o == 0 for d, o in zip(domains, old)):
+                break
+            stack.pop()
+        old, valid = stack[-1]
+        for i, bits in enumerate(domains):
+            removed = old[i] & ~bits
+            if not removed:
+                continue
+            sup = self.supports[i]
+            if popcount(removed) <= popcount(bits):
+                while removed:
+                    low = removed & -removed
+                    valid &= ~sup[low.bit_length() - 1]
+                    removed ^= low
+            else:
+                mask = 0
+                while bits:
+                    low = bits & -bits
+                    mask |= sup[low.bit_length() - 1]
+                    bits ^= low
+                valid &= mask
+        return valid
+
+    def filter(self, csp):
+        '''
+        Prune every value left without a valid tuple. Returns False on a 
+        domain wipe out, otherwise True and the list of variables that lost 
+        values.
+        '''
+        domains = self.current_domains()
+        valid = self.update_valid(domains)
+        if not valid:
+            return False, []
+        changed = []
+        after = list(domains)
+        for i, var in enumerate(self.scope):
+            if var.is_assigned():
+                continue
+            sup = self.supports[i]
+            bits = domains[i]
+            while bits:
+                low = bits & -bits
+                k = low.bit_length() - 1
+                if not sup[k] & valid:
+                    csp.prune_value(var, var.dom[k])
+                    after[i] ^= low
+                bits ^= low
+            if after[i] != domains[i]:
+                changed.append(var)
+        if after != list(self.stack[-1][0]) or valid != self.stack[-1][1]:
+            self.stack.append((tuple(after), valid))
+        return True, changed
+
+def compact_table(cons):
+    '''Return the CompactTable of a constraint, building it on first use'''
+    table = getattr(cons, 'compact_table', None)
+    if table is None or table.relation is not cons.relation or table.size != len(cons.relation):
+        table = cons.compact_table = CompactTable(cons)
+    return table
+
+def prop_CT(csp, newVar=None):
+    '''
+    Do GAC propagation with Compact-Table filtering. Each constraint on the 
+    queue filters all of its variables at once against its bitset of valid 
+    tuples; constraints sharing a variable that lost values are queued again.
+    Constraints without a table use their filter routine if they have one, 
+    and are otherwise revised value by value.
+    '''
+    queue = deque(csp.get_cons_with_var(newVar) if newVar else csp.get_all_cons())
+    queued = set(queue)
+    mark = csp.trail_mark()
+
+    while queue:
+        cons = queue.popleft()
+        queued.discard(cons)
+        if cons.filter is not None:
+            status, changed = cons.filter(csp)
+        elif isinstance(cons, IntensionalConstraint):
+            status, changed = True, []
+            for var in cons.scope:
+                ok, revised = revise(cons, var, csp)
+                if not ok:
+                    status = False
+                    break
+                if revised:
+                    changed.append(var)
+        else:
+            status, changed = compact_table(cons).filter(csp)
+        if not status:
+            return False, csp.pruned_since(mark)
+        for var in changed:
+            for ncons in csp.vars_to_cons[var]:
+                if ncons is not cons and ncons not in queued:
+                    queued.add(ncons)
+                    queue.append(ncons)
+    return True, csp.pruned_since(mark)
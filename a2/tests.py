@@ -142,13 +142,14 @@ def nQueens(n):
     return csp
 
 # SPECIFY WHAT TO TEST
+TEST_CSPBASE     = True
 TEST_MODELS      = True
 TEST_HEURISTICS  = True
 TEST_PROPAGATORS = True
 
 class TestStringMethods(unittest.TestCase):
-    def helper_prop(self, board, prop=prop_FC, var_ord=ord_mrv):
-        csp, var_array = kenken_csp_model(board)
+    def helper_prop(self, board, prop=prop_FC, var_ord=ord_mrv, table_cages=False):
+        csp, var_array = kenken_csp_model(board, table_cages)
         solver = BT(csp)
         solver.quiet()
         solver.bt_search(prop, var_ord)
@@ -168,6 +169,27 @@ class TestStringMethods(unittest.TestCase):
                 bin_count += 1
         self.assertEqual(bin_count, diff_const_count, "Wrong number of binary not equal constraints for binary_ne_grid!")
 
+    @unittest.skipUnless(TEST_CSPBASE, "Not Testing cspbase.")
+    def test_cur_domain(self):
+        a = Variable('A', [3,1,4,5])
+        a.prune_value(1)
+        a.prune_value(5)
+        a.prune_value(5)
+        self.assertEqual(a.cur_domain(), [3,4], "Pruned values still in the current domain")
+        self.assertEqual(a.cur_domain_size(), 2, "Wrong current domain size after pruning")
+        self.assertFalse(a.in_cur_domain(1), "Pruned value reported as current")
+        self.assertFalse(a.in_cur_domain(9), "Value outside the domain reported as current")
+        a.unprune_value(5)
+        a.assign(4)
+        self.assertEqual(a.cur_domain(), [4], "Assigned variable has more than its value")
+        self.assertFalse(a.in_cur_domain(3), "Assigned variable reports another value as current")
+        a.unassign()
+        self.assertEqual(a.cur_domain(), [3,4,5], "Unpruned value not restored")
+        a.add_domain_values([9])
+        a.restore_curdom()
+        self.assertEqual(a.cur_domain(), [3,1,4,5,9], "restore_curdom did not restore every value")
+        self.assertEqual(a.cur_domain_size(), 5, "Wrong current domain size after restoring")
+
     @unittest.skipUnless(TEST_MODELS, "Not Testing Models.")
     def test_bne_grid_1(self):
         board = BOARDS[0]
@@ -208,6 +230,16 @@ class TestStringMethods(unittest.TestCase):
         board = BOARDS[5]
         self.helper_prop(board, prop_GAC)
 
+    @unittest.skipUnless(TEST_PROPAGATORS and TEST_MODELS, "Not Testing Propagators and Models.")
+    def test_props_CT(self):
+        board = BOARDS[3]
+        self.helper_prop(board, prop_CT)
+
+    @unittest.skipUnless(TEST_PROPAGATORS and TEST_MODELS, "Not Testing Propagators and Models.")
+    def test_props_table_cages(self):
+        board = BOARDS[5]
+        self.helper_prop(board, prop_CT, table_cages=True)
+
     @unittest.skipUnless(TEST_HEURISTICS, "Not Testing Heuristics.")
     def test_ord_mrv_1(self):
         a = Variable('A', [1])
@@ -236,6 +268,117 @@ class TestStringMethods(unittest.TestCase):
         var = ord_mrv(simpleCSP)
         self.assertEqual(var.name, simpleCSP.vars[len(simpleCSP.vars)-1].name, "MRV Picked the wrong variable")
 
+    @unittest.skipUnless(TEST_PROPAGATORS, "Not Testing Propagotors.")
+    def test_has_support_residues(self):
+        a = Variable('A', [1,2,3])
+        b = Variable('B', [1,2,3])
+        c = Constraint('A<B', [a,b])
+        c.add_satisfying_tuples([(1,2),(1,3),(2,3)])
+        self.assertTrue(c.has_support(a, 1), "A=1 should be supported by B=2")
+        b.prune_value(2)
+        self.assertTrue(c.has_support(a, 1), "A=1 should still be supported by B=3")
+        b.unprune_value(2)
+        b.prune_value(3)
+        self.assertTrue(c.has_support(a, 1), "Support before the residue was not found")
+        self.assertFalse(c.has_support(a, 2), "A=2 has no support left")
+        self.assertFalse(c.has_support(a, 3), "A=3 never had a support")
+
+    @unittest.skipUnless(TEST_PROPAGATORS, "Not Testing Propagotors.")
+    def test_intensional_queens(self):
+        for prop in (prop_BT, prop_FC, prop_GAC, prop_CT):
+            vars = [Variable('Q{}'.format(i+1), list(range(1,9))) for i in range(8)]
+            csp = CSP("8-Queens", vars)
+            for qi in range(8):
+                for qj in range(qi+1, 8):
+                    check = lambda t, qi=qi, qj=qj: queensCheck(qi, qj, t[0], t[1])
+                    csp.add_constraint(IntensionalConstraint("C(Q{},Q{})".format(qi+1,qj+1),
+                                                             [vars[qi], vars[qj]], check))
+            solver = BT(csp)
+            solver.quiet()
+            solver.bt_search(prop)
+            vals = [v.get_assigned_value() for v in vars]
+            self.assertTrue(all(vals), "{} found no solution".format(prop.__name__))
+            for qi in range(8):
+                for qj in range(qi+1, 8):
+                    self.assertTrue(queensCheck(qi, qj, vals[qi], vals[qj]),
+                                    "{} solution attacks".format(prop.__name__))
+
+    @unittest.skipUnless(TEST_PROPAGATORS, "Not Testing Propagotors.")
+    def test_intensional_filter(self):
+        def less_filter(cons, csp):
+            a, b = cons.scope
+            changed = []
+            for var, keep in ((a, lambda d: d < max(b.cur_domain())), (b, lambda d: d > min(a.cur_domain()))):
+                for d in var.cur_domain():
+                    if not keep(d):
+                        if var.is_assigned():
+                            return False, []
+                        csp.prune_value(var, d)
+                        if var not in changed:
+                            changed.append(var)
+            if a.cur_domain_size() == 0 or b.cur_domain_size() == 0:
+                return False, []
+            return True, changed
+        a = Variable('A', [1,2,3])
+        b = Variable('B', [1,2,3])
+        csp = CSP("Less", [a,b])
+        csp.add_constraint(IntensionalConstraint('A<B', [a,b], lambda t: t[0] < t[1], filter_fn=less_filter))
+        for prop in (prop_GAC, prop_CT):
+            status, pruned = prop(csp)
+            self.assertTrue(status, "Filter reported a wipe out")
+            self.assertEqual((a.cur_domain(), b.cur_domain()), ([1,2], [2,3]), "Filter did not prune")
+            csp.undo_to(0)
+        a.assign(3)
+        self.assertFalse(prop_GAC(csp, a)[0], "A=3 has no support")
+
+    @unittest.skipUnless(TEST_PROPAGATORS, "Not Testing Propagotors.")
+    def test_all_different(self):
+        for bounds in (False, True):
+            a = Variable('A', [1,2])
+            b = Variable('B', [1,2])
+            c = Variable('C', [1,2,3])
+            csp = CSP("AllDiff", [a,b,c])
+            csp.add_constraint(AllDifferent("ad", [a,b,c], bounds))
+            status, pruned = prop_GAC(csp)
+            self.assertTrue(status, "AllDifferent reported a wipe out")
+            self.assertEqual(c.cur_domain(), [3], "AllDifferent missed the Hall set {A, B}")
+            c.prune_value(3)
+            self.assertFalse(prop_GAC(csp)[0], "Three variables cannot take two values")
+
+    @unittest.skipUnless(TEST_PROPAGATORS and TEST_MODELS, "Not Testing Propagators and Models.")
+    def test_cage_filters(self):
+        cages = [(SumCage, 4, [[2,3],[1,2]]), (ProductCage, 6, [[1,3,6],[1,2,6]]),
+                 (DifferenceCage, 3, [[1,3,4,5],[1,2,4,6]]), (QuotientCage, 2, [[1,2,3,4,5],[1,2,4,6]])]
+        for cage, target, answer in cages:
+            a = Variable('A', list(range(1,7)))
+            b = Variable('B', list(range(1,7)))
+            csp = CSP(cage.__name__, [a,b])
+            csp.add_constraint(cage("cage", [a,b], target))
+            b.prune_value(5)
+            b.prune_value(3)
+            status, pruned = prop_GAC(csp)
+            self.assertTrue(status, "{} reported a wipe out".format(cage.__name__))
+            self.assertEqual([a.cur_domain(), b.cur_domain()], answer, 
+                             "{} pruned the wrong values".format(cage.__name__))
+
+    @unittest.skipUnless(TEST_PROPAGATORS, "Not Testing Propagotors.")
+    def test_shared_relation(self):
+        a = Variable('A', [1,2,3])
+        b = Variable('B', [1,2,3])
+        less = Relation(2, [(1,2),(1,3),(2,3)])
+        ab = Constraint('A<B', [a,b], less)
+        ba = Constraint('B<A', [b,a], less)
+        self.assertIs(ab.relation, ba.relation, "Constraints do not share the relation")
+        self.assertTrue(ab.has_support(b, 3) and ba.has_support(b, 1), "Wrong supports through a shared relation")
+        self.assertFalse(ab.has_support(b, 1) or ba.has_support(b, 3), "Wrong supports through a shared relation")
+        self.assertEqual(ab.sup_tuples[(b, 3)], [(1,3),(2,3)], "Wrong sup_tuples through a shared relation")
+        self.assertEqual(ba.sup_tuples[(b, 1)], [(1,2),(1,3)], "Wrong sup_tuples through a shared relation")
+        self.assertIs(ab.sup_tuples, ab.sup_tuples, "sup_tuples rebuilt on each access")
+        ab.add_satisfying_tuples([(2,1)])
+        self.assertTrue(ab.check([2,1]), "Added tuple not in the constraint")
+        self.assertFalse(ba.check([2,1]), "Adding a tuple changed another constraint sharing the relation")
+        self.assertEqual(ab.sup_tuples[(a, 2)], [(2,3),(2,1)], "sup_tuples missed an added tuple")
+
     ##Tests FC after the first queen is placed in position 1.
     @unittest.skipUnless(TEST_PROPAGATORS, "Not Testing Propagotors.")
     def test_simple_FC(self):
@@ -18,6 +18,7 @@ import os
 import random
 
 VISIBILITY_MATRIX_CACHE = {}
+LEGAL_ACTIONS_CACHE = {}
 
 class Layout:
     """
@@ -35,6 +36,7 @@ class Layout:
         self.processLayoutText(layoutText)
         self.layoutText = layoutText
         self.totalFood = len(self.food.asList())
+        self.initializeLegalActions()
         # self.initializeVisibilityMatrix()
 
     def getNumGhosts(self):
@@ -61,6 +63,40 @@ class Layout:
         else:
             self.visibility = VISIBILITY_MATRIX_CACHE[reduce(str.__add__, self.layoutText)]
 
+    def initializeLegalActions(self):
+        """
+        Precomputes the legal actions at every open grid cell.  Walls never
+        change during a game, so this is done once per layout text.
+
+        pacmanActions maps (x,y) to the tuple of actions Pacman may take there;
+        ghostActions maps (x,y) to a dict from the ghost's current direction to
+        the tuple of actions the ghost may take.  Cells on the edge of the
+        board are left out, as are off-grid positions, so callers fall back to
+        Actions.getPossibleActions for those.
+        """
+        global LEGAL_ACTIONS_CACHE
+        key = '\n'.join(self.layoutText)
+        if key not in LEGAL_ACTIONS_CACHE:
+            from game import Actions, Directions
+            pacmanActions, ghostActions = {}, {}
+            for x in range(1, self.width - 1):
+                for y in range(1, self.height - 1):
+                    if self.walls[x][y]: continue
+                    possible = tuple([dir for dir, (dx, dy) in Actions._directionsAsList
+                                      if not self.walls[x + dx][y + dy]])
+                    pacmanActions[(x, y)] = possible
+                    moves = [dir for dir in possible if dir != Directions.STOP]
+                    byDirection = {}
+                    for direction in Directions.REVERSE:
+                        reverse = Directions.REVERSE[direction]
+                        if reverse in moves and len(moves) > 1:
+                            byDirection[direction] = tuple([dir for dir in moves if dir != reverse])
+                        else:
+                            byDirection[direction] = tuple(moves)
+                    ghostActions[(x, y)] = byDirection
+            LEGAL_ACTIONS_CACHE[key] = (pacmanActions, ghostActions)
+        self.pacmanActions, self.ghostActions = LEGAL_ACTIONS_CACHE[key]
+
     def isWall(self, pos):
         x, col = pos
         return self.walls[x][col]